@@ -2,8 +2,9 @@
 WebRTC AEC 处理器 - 基于官方 WebRTC 库
 用于回声消除，解决语音助手中的回声问题
 """
+import ctypes
+import logging
 import platform
-from collections import deque
 from typing import Optional
 import numpy as np
 import sys
@@ -15,6 +16,9 @@ src_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if src_dir not in sys.path:
     sys.path.insert(0, src_dir)
 
+# 逐帧处理路径上的告警走日志（初始化/关闭等一次性信息仍用 print）
+logger = logging.getLogger("aec_processor")
+
 try:
     from webrtc_apm import WebRTCAudioProcessing, create_default_config
     WEBRTC_AVAILABLE = True
@@ -45,10 +49,32 @@ class WebRTCAECProcessor:
         self.capture_config = None
         self.render_config = None
 
-        # 参考信号缓冲区
-        self._reference_buffer = deque()
+        # APM 输入/输出 ctypes 缓冲区（初始化成功后分配，每帧复用）
+        self._cap_in = None
+        self._cap_out = None
+        self._ref_in = None
+        self._ref_out = None
+        self._cap_out_view = None
+
         self._webrtc_frame_size = 160  # WebRTC 标准：16kHz, 10ms = 160 samples
 
+        # 参考信号环形缓冲区（int16，最多保留 200ms）
+        self._ring = np.zeros(self._webrtc_frame_size * 20, dtype=np.int16)
+        self._head = 0  # 读位置
+        self._count = 0  # 有效样本数
+        self._ring_lock = threading.Lock()
+
+        # 没有参考信号时使用的静音帧（只读，所有帧共用，避免每 10ms 分配一次）
+        self._silent_frame = np.zeros(self._webrtc_frame_size, dtype=np.int16)
+        self._silent_frame.flags.writeable = False
+
+        # 取出的参考帧副本（只在 AEC 工作线程中读写，每帧复用）
+        self._ref_frame = np.empty(self._webrtc_frame_size, dtype=np.int16)
+
+        # 参考信号 float32 -> int16 转换的预分配缓冲区（按需扩容，避免每次回调分配临时数组）
+        self._ref_scratch_f32 = np.empty(self._webrtc_frame_size * 6, dtype=np.float32)
+        self._ref_scratch_i16 = np.empty(self._webrtc_frame_size * 6, dtype=np.int16)
+
         # 状态标志
         self._is_initialized = False
 
@@ -126,6 +152,14 @@ class WebRTCAECProcessor:
             # 设置流延迟 - 关键修复！参考 py-xiaozhi
             self.apm.set_stream_delay_ms(40)  # 40ms 延迟（考虑实际传播和处理延迟）
 
+            # 预分配 ctypes 缓冲区，每帧用 memmove 整块复制，避免逐样本转换
+            frame_type = ctypes.c_short * self._webrtc_frame_size
+            self._cap_in = frame_type()
+            self._cap_out = frame_type()
+            self._ref_in = frame_type()
+            self._ref_out = frame_type()
+            self._cap_out_view = np.frombuffer(self._cap_out, dtype=np.int16)
+
             self._is_initialized = True
             print("✅ WebRTC AEC 初始化完成（优化配置）")
             print("   - 回声消除: 已启用（标准模式）")
@@ -151,17 +185,54 @@ class WebRTCAECProcessor:
         # 转换为 int16
         if reference_audio.dtype == np.float32:
             # float32 范围 [-1.0, 1.0] 转换为 int16 范围 [-32768, 32767]
-            reference_audio = (reference_audio * 32768.0).astype(np.int16)
-        elif reference_audio.dtype != np.int16:
-            reference_audio = reference_audio.astype(np.int16)
+            reference_audio = self._float_to_int16(reference_audio)
+        else:
+            # 已是 int16 时不复制；np.copyto 写环形缓冲区可直接处理跨步视图
+            reference_audio = np.asarray(reference_audio, dtype=np.int16)
+
+        # 添加到环形缓冲区
+        with self._ring_lock:
+            self._write_reference(reference_audio)
+
+    def _write_reference(self, samples: np.ndarray):
+        """写入环形缓冲区，超出容量时丢弃最旧的数据（调用方持有 _ring_lock）"""
+        capacity = len(self._ring)
+        n = len(samples)
+
+        if n >= capacity:
+            # 单次写入超过 200ms，只保留最新部分
+            self._ring[:] = samples[-capacity:]
+            self._head = 0
+            self._count = capacity
+            return
 
-        # 添加到缓冲区
-        self._reference_buffer.extend(reference_audio)
+        tail = (self._head + self._count) % capacity
+        first = min(n, capacity - tail)
+        np.copyto(self._ring[tail:tail + first], samples[:first])
+        if first < n:
+            np.copyto(self._ring[:n - first], samples[first:])
 
         # 保持缓冲区大小合理（最多 200ms）
-        max_buffer_size = self._webrtc_frame_size * 20
-        while len(self._reference_buffer) > max_buffer_size:
-            self._reference_buffer.popleft()
+        overflow = self._count + n - capacity
+        if overflow > 0:
+            self._head = (self._head + overflow) % capacity
+            self._count = capacity
+        else:
+            self._count += n
+
+    def _float_to_int16(self, audio: np.ndarray) -> np.ndarray:
+        """在预分配缓冲区中完成缩放、限幅和类型转换，返回 int16 视图"""
+        n = len(audio)
+        if n > len(self._ref_scratch_f32):
+            self._ref_scratch_f32 = np.empty(n, dtype=np.float32)
+            self._ref_scratch_i16 = np.empty(n, dtype=np.int16)
+
+        scratch_f32 = self._ref_scratch_f32[:n]
+        scratch_i16 = self._ref_scratch_i16[:n]
+        np.multiply(audio, 32768.0, out=scratch_f32)
+        np.clip(scratch_f32, -32768.0, 32767.0, out=scratch_f32)
+        np.copyto(scratch_i16, scratch_f32, casting='unsafe')
+        return scratch_i16
 
     def process(self, capture_audio: np.ndarray) -> np.ndarray:
         """
@@ -176,119 +247,151 @@ class WebRTCAECProcessor:
         if not self._is_initialized or self.apm is None:
             return capture_audio
 
-        # 使用线程锁保护 WebRTC APM 调用
-        with self._lock:
-            try:
-                # 检查输入帧大小是否为 WebRTC 帧大小的整数倍
-                if len(capture_audio) % self._webrtc_frame_size != 0:
-                    print(f"⚠️ 音频帧大小不是 WebRTC 帧的整数倍: {len(capture_audio)}")
-                    return capture_audio
+        # 线程锁只在 _process_single_frame 内保护 APM 调用，打印和异常处理都在锁外
+        try:
+            # 检查输入帧大小是否为 WebRTC 帧大小的整数倍
+            if len(capture_audio) % self._webrtc_frame_size != 0:
+                logger.warning("音频帧大小不是 WebRTC 帧的整数倍: %d", len(capture_audio))
+                return capture_audio
 
-                # 计算需要分割的块数
-                num_chunks = len(capture_audio) // self._webrtc_frame_size
+            # 计算需要分割的块数
+            num_chunks = len(capture_audio) // self._webrtc_frame_size
 
-                if num_chunks == 1:
-                    # 10ms 帧，直接处理
-                    return self._process_single_frame(capture_audio)
-                else:
-                    # 20ms/40ms/60ms 帧，分割处理
-                    return self._process_chunked_frames(capture_audio, num_chunks)
+            if num_chunks == 1:
+                # 10ms 帧，直接处理
+                return self._process_single_frame(capture_audio)
+            else:
+                # 20ms/40ms/60ms 帧，分割处理
+                return self._process_chunked_frames(capture_audio, num_chunks)
 
-            except Exception as e:
-                print(f"⚠️ AEC 处理失败: {e}")
-                import traceback
-                traceback.print_exc()
-                return capture_audio
+        except Exception as e:
+            logger.exception("AEC 处理失败: %s", e)
+            return capture_audio
 
-    def _process_single_frame(self, capture_audio: np.ndarray) -> np.ndarray:
-        """处理单个 10ms WebRTC 帧"""
-        import ctypes
+    def _process_single_frame(self, capture_audio: np.ndarray,
+                              out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        处理单个 10ms WebRTC 帧
 
+        Args:
+            capture_audio: 麦克风音频帧（int16）
+            out: 可选的输出数组切片；提供时结果直接写入其中并返回 out
+        """
         try:
             # 确保输入是正确的类型和大小
             if len(capture_audio) != self._webrtc_frame_size:
-                print(f"⚠️ 帧大小不匹配: {len(capture_audio)} != {self._webrtc_frame_size}")
-                return capture_audio
-
-            # 确保是 int16 类型
-            if capture_audio.dtype != np.int16:
-                capture_audio = capture_audio.astype(np.int16)
+                logger.warning("帧大小不匹配: %d != %d", len(capture_audio), self._webrtc_frame_size)
+                return self._passthrough(capture_audio, out)
 
             # 获取参考信号
             reference_audio = self._get_reference_frame(self._webrtc_frame_size)
 
             # 确保参考信号也是正确的类型和大小
             if len(reference_audio) != self._webrtc_frame_size:
-                reference_audio = np.zeros(self._webrtc_frame_size, dtype=np.int16)
-
-            # 创建 ctypes 缓冲区 - 使用 python3.7 项目的方式
-            capture_buffer = (ctypes.c_short * self._webrtc_frame_size)(*capture_audio)
-            reference_buffer = (ctypes.c_short * self._webrtc_frame_size)(*reference_audio)
-
-            processed_capture = (ctypes.c_short * self._webrtc_frame_size)()
-            processed_reference = (ctypes.c_short * self._webrtc_frame_size)()
-
-            # 首先处理参考信号（render stream）
-            render_result = self.apm.process_reverse_stream(
-                reference_buffer,
-                self.render_config,
-                self.render_config,
-                processed_reference,
-            )
+                reference_audio = self._silent_frame
+
+            # memmove 需要连续的 int16 内存（聚合设备的单通道是跨步视图）；
+            # 已满足时不复制，类型转换和连续化最多合并为一次复制
+            capture_audio = np.ascontiguousarray(capture_audio, dtype=np.int16)
+
+            if out is None:
+                out = np.empty(self._webrtc_frame_size, dtype=np.int16)
+
+            # 锁内只做缓冲区复制和 APM 调用（预分配的 ctypes 缓冲区是共享的）
+            frame_bytes = self._webrtc_frame_size * 2
+            with self._lock:
+                ctypes.memmove(self._cap_in, capture_audio.ctypes.data, frame_bytes)
+
+                # 首先处理参考信号（render stream）；静音帧也要送入，
+                # AEC 需要每个采集帧对应一个参考帧，才能维持 render 缓冲和延迟估计
+                ctypes.memmove(self._ref_in, reference_audio.ctypes.data, frame_bytes)
+                render_result = self.apm.process_reverse_stream(
+                    self._ref_in,
+                    self.render_config,
+                    self.render_config,
+                    self._ref_out,
+                )
+
+                # 然后处理采集信号（capture stream）
+                capture_result = self.apm.process_stream(
+                    self._cap_in,
+                    self.capture_config,
+                    self.capture_config,
+                    self._cap_out,
+                )
+
+                if capture_result == 0:
+                    np.copyto(out, self._cap_out_view)
 
             if render_result != 0:
-                print(f"⚠️ 参考信号处理失败，错误码: {render_result}")
-
-            # 然后处理采集信号（capture stream）
-            capture_result = self.apm.process_stream(
-                capture_buffer,
-                self.capture_config,
-                self.capture_config,
-                processed_capture,
-            )
+                logger.warning("参考信号处理失败，错误码: %s", render_result)
 
             if capture_result != 0:
-                print(f"⚠️ 采集信号处理失败，错误码: {capture_result}")
-                return capture_audio
+                logger.warning("采集信号处理失败，错误码: %s", capture_result)
+                return self._passthrough(capture_audio, out)
 
-            # 转换回 numpy 数组
-            return np.array(processed_capture, dtype=np.int16)
+            return out
 
         except Exception as e:
-            print(f"⚠️ AEC 帧处理失败: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("AEC 帧处理失败: %s", e)
+            return self._passthrough(capture_audio, out)
+
+    @staticmethod
+    def _passthrough(capture_audio: np.ndarray, out: Optional[np.ndarray]) -> np.ndarray:
+        """处理失败时原样返回输入（有 out 时复制进 out）"""
+        if out is None:
             return capture_audio
+        out[:] = capture_audio
+        return out
 
     def _process_chunked_frames(self, capture_audio: np.ndarray, num_chunks: int) -> np.ndarray:
         """分割处理大帧（20ms/40ms/60ms 等）"""
-        processed_chunks = []
+        # 一次分配输出数组，每个 10ms 块直接写入对应切片
+        result = np.empty(len(capture_audio), dtype=np.int16)
 
         for i in range(num_chunks):
             # 提取当前 10ms 块
             start_idx = i * self._webrtc_frame_size
             end_idx = (i + 1) * self._webrtc_frame_size
-            chunk = capture_audio[start_idx:end_idx]
 
             # 处理这个 10ms 块
-            processed_chunk = self._process_single_frame(chunk)
-            processed_chunks.append(processed_chunk)
+            self._process_single_frame(capture_audio[start_idx:end_idx], out=result[start_idx:end_idx])
 
-        # 将所有处理后的块重新组合
-        return np.concatenate(processed_chunks)
+        return result
 
     def _get_reference_frame(self, frame_size: int) -> np.ndarray:
-        """获取指定大小的参考信号帧"""
-        # 如果没有参考信号或缓冲区不足，返回静音
-        if len(self._reference_buffer) < frame_size:
-            return np.zeros(frame_size, dtype=np.int16)
-
-        # 从缓冲区提取一帧
-        frame_data = []
-        for _ in range(frame_size):
-            frame_data.append(self._reference_buffer.popleft())
+        """
+        获取指定大小的参考信号帧
 
-        return np.array(frame_data, dtype=np.int16)
+        在 _ring_lock 内把数据复制到预分配的 _ref_frame 中再返回，释放锁后
+        add_reference 写入环形缓冲区不会影响调用方正在使用的这一帧。
+        """
+        with self._ring_lock:
+            # 如果没有参考信号或缓冲区不足，返回静音
+            if self._count < frame_size:
+                if frame_size == len(self._silent_frame):
+                    return self._silent_frame
+                return np.zeros(frame_size, dtype=np.int16)
+
+            if frame_size == len(self._ref_frame):
+                frame = self._ref_frame
+            else:
+                frame = np.empty(frame_size, dtype=np.int16)
+
+            # 从环形缓冲区复制一帧（跨越末尾时分两段复制）
+            capacity = len(self._ring)
+            head = self._head
+            end = head + frame_size
+            if end <= capacity:
+                np.copyto(frame, self._ring[head:end])
+            else:
+                first = capacity - head
+                np.copyto(frame[:first], self._ring[head:])
+                np.copyto(frame[first:], self._ring[:end - capacity])
+
+            self._head = end % capacity
+            self._count -= frame_size
+            return frame
 
     def close(self):
         """关闭 AEC 处理器"""
@@ -305,7 +408,9 @@ class WebRTCAECProcessor:
                 self.render_config = None
                 self.apm = None
 
-        self._reference_buffer.clear()
+        with self._ring_lock:
+            self._head = 0
+            self._count = 0
         self._is_initialized = False
         print("✅ WebRTC AEC 已关闭")
 
@@ -3,13 +3,20 @@
 支持 AEC（回声消除）功能
 支持聚合设备（硬件 AEC）- 参考 py-xiaozhi 优化
 """
+import logging
 import pyaudio
 import threading
 import queue
-import time
+from collections import deque
 import numpy as np
 from typing import Callable, Optional
 
+# AEC 工作线程的调试/错误输出走日志，避免在音频路径上同步写 stdout
+logger = logging.getLogger("audio_input")
+
+# AEC 工作线程积压时一次合并处理的最大帧数（合并后的总时长需小于 AEC 参考信号缓冲的 200ms）
+AEC_MAX_BATCH_FRAMES = 8
+
 
 class AudioInput:
     """麦克风音频输入 - 优化 AEC 支持"""
@@ -47,9 +54,15 @@ class AudioInput:
         self.audio = pyaudio.PyAudio()
         self.stream = None
         self.is_recording = False
-        self.audio_queue = queue.Queue()
+        # 拉取模式的缓冲上限约 5 秒（默认 10ms 一块），消费方跟不上时丢弃最旧块，避免无限增长
+        self.audio_queue = queue.Queue(maxsize=500)
         self.record_thread = None
 
+        # AEC 模式下回调只负责入队，由 record_thread 调用 APM（约 0.5 秒上限，满了丢最旧帧）
+        # deque(maxlen) 的 append/popleft 在 GIL 下是原子的，满时自动挤掉最旧帧
+        self._aec_frames = deque(maxlen=50)
+        self._aec_ready = threading.Event()
+
         # 如果使用聚合设备，自动检测通道数
         if use_aggregate_device and device_index is not None:
             device_info = self.audio.get_device_info_by_index(device_index)
@@ -63,9 +76,8 @@ class AudioInput:
         else:
             self.channels = channels
 
-        # 统计信息（用于调试）
-        self._frame_count = 0
-        self._last_stats_time = time.time()
+        # 统计信息（用于调试）：按帧计数节流，回调路径上不读时钟
+        self._aec_counter = 0
 
     def start(self, audio_callback: Optional[Callable[[bytes], None]] = None):
         """
@@ -92,6 +104,13 @@ class AudioInput:
         )
 
         self.is_recording = True
+
+        if self._use_aec():
+            self._aec_frames.clear()  # 丢弃上次录音残留的帧
+            self._aec_ready.clear()
+            self.record_thread = threading.Thread(target=self._aec_worker, daemon=True)
+            self.record_thread.start()
+
         self.stream.start_stream()
 
         if self.use_aggregate_device:
@@ -103,77 +122,125 @@ class AudioInput:
         # if status:
         #     print(f'[音频输入] 状态: {status}')  # 静默
 
-        # 如果使用聚合设备（AEC 模式）
-        if self.use_aggregate_device and self.channels >= 2 and self.enable_aec and self.aec_processor:
+        # 如果使用聚合设备（AEC 模式）：APM 处理可能耗时数毫秒，交给工作线程
+        if self._use_aec():
+            # 工作线程跟不上时 deque 自动丢弃最旧的一帧，回调不会阻塞
+            self._aec_frames.append(in_data)
+            self._aec_ready.set()
+
+        else:
+            # 不使用 AEC，直接传递
+            self._deliver(in_data)
+
+        return (None, pyaudio.paContinue)
+
+    def _use_aec(self) -> bool:
+        """是否走聚合设备 + 软件 AEC 路径"""
+        return bool(self.use_aggregate_device and self.channels >= 2 and self.enable_aec and self.aec_processor)
+
+    def _aec_worker(self):
+        """AEC 工作线程：从队列取原始多通道数据，做回声消除后分发"""
+        # 每帧都要访问的属性在录音期间不变，缓存为局部变量
+        frames = self._aec_frames
+        ready = self._aec_ready
+        channels = self.channels
+        add_reference = self.aec_processor.add_reference
+        process = self.aec_processor.process
+        deliver = self._deliver
+
+        while True:
+            # 阻塞等待数据（由 PortAudio 回调推送），stop() 放入 None 唤醒退出
+            try:
+                in_data = frames.popleft()
+            except IndexError:
+                # 先清除再复查，避免回调在两步之间入队导致错过唤醒
+                ready.clear()
+                if not frames:
+                    ready.wait()
+                continue
+            if in_data is None:
+                break
+
+            stopping = False
+            if frames:
+                # 积压时一次取出多帧合并处理，摊薄每次 numpy/APM 调用的开销；
+                # 没有积压时仍逐帧处理，不增加延迟
+                batch = [in_data]
+                while frames and len(batch) < AEC_MAX_BATCH_FRAMES:
+                    item = frames.popleft()
+                    if item is None:
+                        stopping = True
+                        break
+                    batch.append(item)
+                in_data = b''.join(batch)
+
             try:
                 # 转换为 numpy 数组
                 audio_array = np.frombuffer(in_data, dtype=np.int16)
 
                 # 重塑为 (samples, channels)
-                audio_array = audio_array.reshape(-1, self.channels)
+                audio_array = audio_array.reshape(-1, channels)
 
                 # 通道 0: 麦克风
                 mic_channel = audio_array[:, 0]
 
                 # 通道 1: BlackHole（参考信号）
-                if self.channels == 2:
-                    reference_channel = audio_array[:, 1]
-                elif self.channels >= 3:
-                    # 3 通道：使用左声道或取平均
-                    reference_channel = audio_array[:, 1]
-
-                # 计算原始音量
-                mic_rms = np.sqrt(np.mean(mic_channel.astype(np.float32) ** 2))
-                ref_rms = np.sqrt(np.mean(reference_channel.astype(np.float32) ** 2))
+                # 3 通道时同样使用左声道
+                reference_channel = audio_array[:, 1]
 
                 # 添加参考信号并处理
-                self.aec_processor.add_reference(reference_channel)
-                processed = self.aec_processor.process(mic_channel)
-
-                # 计算处理后音量
-                processed_rms = np.sqrt(np.mean(processed.astype(np.float32) ** 2))
+                add_reference(reference_channel)
+                processed = process(mic_channel)
 
-                # 调试：每 50 次打印一次
-                if not hasattr(self, '_aec_counter'):
-                    self._aec_counter = 0
+                # 调试：每 50 次打印一次（音量只在打印时计算，避免每帧分配 float 临时数组）
                 self._aec_counter += 1
                 if self._aec_counter % 50 == 0:
+                    mic_rms = self._rms(mic_channel)
+                    ref_rms = self._rms(reference_channel)
+                    processed_rms = self._rms(processed)
                     reduction = mic_rms - processed_rms
                     reduction_percent = (reduction / mic_rms * 100) if mic_rms > 0 else 0
-                    print(f"[AEC] 麦克风: {mic_rms:.1f}, 参考: {ref_rms:.1f} → 处理后: {processed_rms:.1f} (消除: {reduction:.1f}, {reduction_percent:.1f}%)")
+                    logger.info("[AEC] 麦克风: %.1f, 参考: %.1f → 处理后: %.1f (消除: %.1f, %.1f%%)",
+                                mic_rms, ref_rms, processed_rms, reduction, reduction_percent)
 
                 # 转换回字节
                 processed_data = processed.tobytes()
 
-                # 将处理后的音频数据放入队列
-                self.audio_queue.put(processed_data)
-
-                # 调用用户回调
-                if self.audio_callback:
-                    self.audio_callback(processed_data)
-
             except Exception as e:
-                print(f'[音频输入] AEC 处理错误: {e}')
-                import traceback
-                traceback.print_exc()
+                logger.exception("[音频输入] AEC 处理错误: %s", e)
                 # 如果 AEC 处理失败，使用原始音频（只取通道 0）
                 audio_array = np.frombuffer(in_data, dtype=np.int16)
-                audio_array = audio_array.reshape(-1, self.channels)
-                mic_channel = audio_array[:, 0]
-                processed_data = mic_channel.tobytes()
-                self.audio_queue.put(processed_data)
-                if self.audio_callback:
-                    self.audio_callback(processed_data)
+                audio_array = audio_array.reshape(-1, channels)
+                processed_data = audio_array[:, 0].tobytes()
 
-        else:
-            # 不使用 AEC，直接传递
-            self.audio_queue.put(in_data)
+            deliver(processed_data)
+            if stopping:
+                break
 
-            # 调用用户回调
-            if self.audio_callback:
-                self.audio_callback(in_data)
+    def _deliver(self, audio_data: bytes):
+        """
+        分发一块音频：有回调时直接推给回调，否则放入队列供 get_audio_data 拉取
 
-        return (None, pyaudio.paContinue)
+        两者同时使用时队列无人消费，会无限增长，且每块都要多一次加锁入队。
+        """
+        if self.audio_callback:
+            self.audio_callback(audio_data)
+        else:
+            try:
+                self.audio_queue.put_nowait(audio_data)
+            except queue.Full:
+                # 只有一个生产者，腾出一个位置后再放入不会再满
+                try:
+                    self.audio_queue.get_nowait()
+                except queue.Empty:
+                    pass
+                self.audio_queue.put_nowait(audio_data)
+
+    @staticmethod
+    def _rms(samples: np.ndarray) -> float:
+        """计算 int16 音频的均方根音量"""
+        samples = samples.astype(np.float32)
+        return float(np.sqrt(np.dot(samples, samples) / len(samples))) if len(samples) else 0.0
 
     def stop(self):
         """停止录音"""
@@ -187,6 +254,13 @@ class AudioInput:
             self.stream.close()
             self.stream = None
 
+        if self.record_thread:
+            # 流已停止，不会再有回调入队；放入结束信号唤醒工作线程
+            self._aec_frames.append(None)
+            self._aec_ready.set()
+            self.record_thread.join(timeout=1.0)
+            self.record_thread = None
+
         # print('[音频输入] 停止录音')  # 静默
 
     def close(self):
@@ -199,7 +273,7 @@ class AudioInput:
 
     def get_audio_data(self, timeout: float = 1.0) -> Optional[bytes]:
         """
-        从队列获取音频数据
+        从队列获取音频数据（仅在 start() 未传入 audio_callback 时可用）
 
         Args:
             timeout: 超时时间（秒）
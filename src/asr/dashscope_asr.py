@@ -5,6 +5,7 @@ DashScope 实时语音识别客户端
 import dashscope
 from dashscope.audio.asr import Recognition, RecognitionCallback, RecognitionResult
 from typing import Callable, Optional
+import threading
 import time
 
 
@@ -75,20 +76,30 @@ class RealtimeASRCallback(RecognitionCallback):
 class DashScopeASR:
     """DashScope 实时语音识别客户端"""
 
-    def __init__(self, api_key: str, model: str = "fun-asr-realtime-2025-11-07"):
+    def __init__(self, api_key: str, model: str = "fun-asr-realtime-2025-11-07",
+                 send_batch_ms: int = 40):
         """
         初始化 ASR 客户端
 
         Args:
             api_key: DashScope API Key
             model: 模型名称（默认使用 FunASR 2025-11-07 版本）
+            send_batch_ms: 合并多少毫秒的音频再发送一帧（麦克风每 10ms 回调一次，
+                逐块发送会产生大量小 WebSocket 帧；0 表示不合并）
         """
         self.api_key = api_key
         self.model = model
+        self.send_batch_ms = send_batch_ms
         self.recognition = None
         self.callback = None
         self.is_running = False
 
+        # 待发送的音频块（凑满 _batch_bytes 后 join 成一帧发送，只拷贝一次）
+        self._send_chunks = []
+        self._send_len = 0
+        self._batch_bytes = 0
+        self._send_lock = threading.Lock()
+
         # 设置 API Key
         dashscope.api_key = api_key
 
@@ -129,6 +140,11 @@ class DashScopeASR:
             audio_event_detection_enabled=audio_event_detection_enabled
         )
 
+        # 16bit 单声道 PCM 每毫秒的字节数 = sample_rate * 2 / 1000
+        self._batch_bytes = sample_rate * 2 * self.send_batch_ms // 1000 if format == "pcm" else 0
+        self._send_chunks.clear()
+        self._send_len = 0
+
         # 启动识别
         try:
             self.recognition.start()
@@ -158,6 +174,26 @@ class DashScopeASR:
         if not self.is_running or not self.recognition:
             return
 
+        with self._send_lock:
+            if not self._batch_bytes:
+                self._send_frame(audio_data)
+                return
+
+            self._send_chunks.append(audio_data)
+            self._send_len += len(audio_data)
+            if self._send_len >= self._batch_bytes:
+                self._flush_send_chunks()
+
+    def _flush_send_chunks(self):
+        """把缓存的音频块合并为一帧发送（调用方持有 _send_lock）"""
+        # SDK 会把帧放入内部队列异步发送，这里必须交出独立的 bytes，不能是可复用缓冲区的视图
+        frame = self._send_chunks[0] if len(self._send_chunks) == 1 else b''.join(self._send_chunks)
+        self._send_chunks.clear()
+        self._send_len = 0
+        self._send_frame(frame)
+
+    def _send_frame(self, audio_data: bytes):
+        """发送一帧音频到识别服务"""
         try:
             self.recognition.send_audio_frame(audio_data)
         except Exception as e:
@@ -168,6 +204,11 @@ class DashScopeASR:
         if not self.is_running or not self.recognition:
             return
 
+        # 发送剩余不足一批的音频
+        with self._send_lock:
+            if self._send_chunks:
+                self._flush_send_chunks()
+
         try:
             self.recognition.stop()
             self.is_running = False
@@ -68,7 +68,7 @@ class InterruptController:
         if not self.is_monitoring:
             return
 
-        current_time = time.time()
+        current_time = time.monotonic()
 
         if has_voice:
             self.last_voice_time = current_time
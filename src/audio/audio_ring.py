@@ -0,0 +1,147 @@
+"""
+单生产者/单消费者音频环形缓冲区
+TTS 接收线程写入，播放器读取；接口与 queue.Queue 的常用部分保持一致
+"""
+import queue
+import threading
+import time
+from typing import Optional
+
+
+class AudioRingBuffer:
+    """
+    SPSC 环形缓冲区（无锁）
+
+    只有生产者修改 _tail、只有消费者修改 _head，在 GIL 下整数赋值是原子的，
+    因此读写都不需要加锁；队列为空时消费者阻塞在 Event 上，而不是轮询。
+    """
+
+    def __init__(self, capacity: int = 4096):
+        """
+        Args:
+            capacity: 槽位数（向上取整为 2 的幂）；TTS 合成通常快于播放，需留足余量
+        """
+        size = 1
+        while size < capacity:
+            size <<= 1
+        self._slots = [None] * size
+        self._mask = size - 1
+        self._head = 0  # 读位置（仅消费者修改）
+        self._tail = 0  # 写位置（仅生产者修改）
+        self._closed = False
+        self._flush_to = 0  # clear() 请求跳过到的位置（由消费者应用）
+        self._not_empty = threading.Event()
+        self._not_full = threading.Event()
+
+    def put(self, item, timeout: Optional[float] = None):
+        """写入一项（生产者调用）；缓冲区满时等待消费者腾出空间，已关闭时直接丢弃"""
+        if self._closed:
+            return
+        tail = self._tail
+        while self._is_full(tail):
+            self._not_full.clear()
+            if not self._is_full(tail):
+                break
+            if self._closed:
+                return
+            if not self._not_full.wait(timeout):
+                raise queue.Full
+            if self._closed:
+                return  # 等待期间被关闭（打断），消费者可能已不再读取
+        self._slots[tail & self._mask] = item
+        self._tail = tail + 1
+        self._not_empty.set()
+
+    def put_nowait(self, item):
+        """非阻塞写入，满时抛出 queue.Full"""
+        if self._is_full(self._tail):
+            raise queue.Full
+        self.put(item)
+
+    def _is_full(self, tail: int) -> bool:
+        """
+        生产者侧判满：clear() 丢弃的槽位无需等消费者应用即可复用
+
+        但消费者正在读取的槽位（_head）不能被覆盖。先读 _flush_to 再读 _head（两者只增不减），
+        消费者下一次读取必然先跳到 _flush_to 之后，因此只需避开当前的 _head。
+        """
+        flush_to = self._flush_to
+        head = self._head
+        if tail - max(head, flush_to) > self._mask:
+            return True
+        return tail - head == self._mask + 1
+
+    def get(self, timeout: Optional[float] = None):
+        """读取一项（消费者调用）；为空时阻塞等待，超时抛出 queue.Empty"""
+        head = self._skip_flushed()
+        if head == self._tail:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while head == self._tail:
+                if self._closed and head == self._tail:
+                    return None  # 与 put(None) 相同的结束信号
+                # 先清除再复查，避免生产者/close 在两步之间触发导致错过唤醒
+                self._not_empty.clear()
+                if head != self._tail or self._closed:
+                    continue
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise queue.Empty
+                self._not_empty.wait(remaining)
+                head = self._skip_flushed()
+
+        index = head & self._mask
+        item = self._slots[index]
+        self._slots[index] = None  # 释放引用，便于回收
+        self._head = head + 1
+        self._not_full.set()
+        return item
+
+    def get_nowait(self):
+        """非阻塞读取，空时抛出 queue.Empty；已关闭且取空时返回 None（结束信号）"""
+        closed = self._closed  # 先读关闭标志：关闭前写入的数据仍会先被取完
+        if self.empty():
+            self._skip_flushed()  # 应用 clear()，让等待空位的生产者可以复用全部槽位
+            if closed:
+                return None
+            raise queue.Empty
+        return self.get()
+
+    def _skip_flushed(self) -> int:
+        """消费者侧应用 clear() 请求：直接移动读位置，不逐项出队"""
+        head = self._head
+        flush_to = self._flush_to
+        if flush_to > head:
+            head = self._head = flush_to
+            self._not_full.set()
+        return head
+
+    def clear(self):
+        """
+        丢弃所有尚未读取的数据（任意线程均可调用，O(1)）
+
+        只记录当前写位置，由消费者下次读取时一次性跳过，保持读位置只由消费者修改。
+        """
+        self._flush_to = self._tail
+        self._not_empty.set()
+        self._not_full.set()  # 唤醒因缓冲区满而等待的生产者
+
+    def close(self):
+        """
+        结束数据流（任意线程均可调用）
+
+        消费者读完已写入的数据后 get 返回 None；用于生产者之外的线程（如打断）
+        发出结束信号，避免出现第二个生产者。
+        """
+        self._closed = True
+        self._not_empty.set()
+        self._not_full.set()  # 同时唤醒因缓冲区满而等待的生产者
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def empty(self) -> bool:
+        return max(self._head, self._flush_to) == self._tail
+
+    def qsize(self) -> int:
+        return self._tail - max(self._head, self._flush_to)
@@ -1,10 +1,11 @@
 """
 使用 PyAudio 实现真正的流式播放
-边接收 PCM 数据边播放，无缓冲延迟
+回调模式：PortAudio 需要数据时从队列拉取，无轮询延迟
 支持 AEC 参考信号回调
 """
 import queue
 import threading
+import time
 from typing import Optional, Callable
 
 
@@ -30,6 +31,15 @@ class PyAudioStreamPlayer:
         self.audio = None
         self.stream = None
 
+        # 回调模式状态
+        self._pa = None
+        self._audio_queue = None
+        self._pending = b""  # 当前音频块
+        self._pending_offset = 0  # 当前块已播放到的位置
+        self._last_data_time = 0.0
+        self._silence = b""
+        self._finished = threading.Event()
+
     def play_stream(self, audio_queue: queue.Queue, blocking: bool = True):
         """
         播放音频流
@@ -49,63 +59,39 @@ class PyAudioStreamPlayer:
             thread.start()
 
     def _play_stream_blocking(self, audio_queue: queue.Queue):
-        """阻塞式播放"""
+        """阻塞式播放：PortAudio 回调按需拉取数据，本线程只等待播放结束"""
         try:
             import pyaudio
+            self._pa = pyaudio
 
             # 初始化 PyAudio
             self.audio = pyaudio.PyAudio()
 
-            # 打开音频流
+            self._audio_queue = audio_queue
+            self._pending = b""
+            self._pending_offset = 0
+            self._last_data_time = time.monotonic()
+            self._finished.clear()
+            self.is_playing = True
+
+            # 打开音频流（回调模式，由 PortAudio 音频线程拉取数据）
             self.stream = self.audio.open(
                 format=self.audio.get_format_from_width(self.sample_width),
                 channels=self.channels,
                 rate=self.sample_rate,
                 output=True,
-                frames_per_buffer=1024  # 小缓冲区，降低延迟
+                frames_per_buffer=1024,  # 小缓冲区，降低延迟
+                stream_callback=self._stream_callback
             )
-
-            self.is_playing = True
             # print('[播放器] PyAudio 流式播放已启动')  # 静默
 
-            total_bytes = 0
-            chunk_count = 0
-
-            # 从队列读取并播放
-            while self.is_playing:
-                try:
-                    audio_chunk = audio_queue.get(timeout=10)
-
-                    if audio_chunk is None:  # 结束信号
-                        # print(f'[播放器] 播放完成: {chunk_count} 块, {total_bytes} 字节')  # 静默
-                        break
-
-                    # 检查是否被停止
-                    if not self.is_playing:
-                        # print('[播放器] 播放被中断')  # 静默
-                        break
-
-                    # 直接写入音频流
-                    self.stream.write(audio_chunk)
-                    total_bytes += len(audio_chunk)
-                    chunk_count += 1
-
-                    # 如果有参考音频回调，调用它（用于 AEC）
-                    if self.reference_callback:
-                        self.reference_callback(audio_chunk)
-
-                    # if chunk_count == 1:
-                    #     print('[播放器] 首个音频块已播放')  # 静默
-                    # elif chunk_count % 20 == 0:
-                    #     print(f'[播放器] 已播放 {chunk_count} 块')  # 静默
-
-                except queue.Empty:
-                    # print('[播放器] 等待音频数据超时')  # 静默
-                    break
-                except Exception as e:
-                    # 打断时可能出现 PortAudio 错误，静默处理
-                    # print(f'❌ 播放错误: {e}')  # 静默
+            # 等待播放结束（结束信号、超时或 stop() 打断）；分段等待，
+            # 流未能启动、设备断开或回调不再运行时也能退出
+            while not self._finished.wait(0.5):
+                if not self.is_playing or not self.stream.is_active():
                     break
+                if time.monotonic() - self._last_data_time > 11:
+                    break  # 回调本应在 10 秒无数据时结束播放，说明回调已不再运行
 
         except ImportError:
             print('❌ 错误: 未安装 pyaudio')
@@ -126,11 +112,73 @@ class PyAudioStreamPlayer:
                 self.audio.terminate()
             self.is_playing = False
 
+    def _stream_callback(self, in_data, frame_count, time_info, status):
+        """
+        PortAudio 回调：从队列取数据填满一个硬件缓冲区
+
+        不阻塞等待数据；数据不足时补静音，避免欠载爆音。
+        """
+        nbytes = frame_count * self.channels * self.sample_width
+        if len(self._silence) < nbytes:
+            self._silence = bytes(nbytes)
+
+        try:
+            if not self.is_playing:
+                # 被打断
+                self._finished.set()
+                return (self._silence[:nbytes], self._pa.paComplete)
+
+            # 循环内用局部变量，结束后再写回实例属性
+            pending = self._pending
+            offset = self._pending_offset
+            get_nowait = self._audio_queue.get_nowait
+            parts = []
+            filled = 0
+            end_of_stream = False
+            while filled < nbytes:
+                remaining = len(pending) - offset
+                if remaining <= 0:
+                    try:
+                        audio_chunk = get_nowait()
+                    except queue.Empty:
+                        break
+                    if audio_chunk is None:  # 结束信号
+                        end_of_stream = True
+                        break
+                    pending = audio_chunk
+                    offset = 0
+                    continue
+
+                take = min(remaining, nbytes - filled)
+                parts.append(memoryview(pending)[offset:offset + take])
+                offset += take
+                filled += take
+            self._pending = pending
+            self._pending_offset = offset
+
+            now = time.monotonic()
+            if filled:
+                self._last_data_time = now
+                # 如果有参考音频回调，调用它（用于 AEC）
+                if self.reference_callback:
+                    self.reference_callback(b"".join(parts))
+
+            if filled < nbytes:
+                parts.append(memoryview(self._silence)[:nbytes - filled])
+            data = b"".join(parts)
+
+            # 结束信号，或长时间没有数据（与原先 get(timeout=10) 一致）
+            if end_of_stream or now - self._last_data_time > 10:
+                self._finished.set()
+                return (data, self._pa.paComplete)
+            return (data, self._pa.paContinue)
+
+        except Exception:
+            # 回调内异常会导致流中止，先唤醒等待线程
+            self._finished.set()
+            return (self._silence[:nbytes], self._pa.paAbort)
+
     def stop(self):
-        """停止播放"""
+        """停止播放（只发出信号，流由播放线程负责停止和关闭）"""
         self.is_playing = False
-        try:
-            if self.stream and self.stream.is_active():
-                self.stream.stop_stream()
-        except Exception as e:
-            pass  # 忽略停止时的错误（打断时可能已关闭）
+        self._finished.set()
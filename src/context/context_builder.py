@@ -55,7 +55,7 @@ class ContextBuilder:
         )
 
         # 当前会话ID
-        self.current_session_id = str(uuid.uuid4())
+        self.current_session_id = uuid.uuid4().hex
 
     def build_context(
         self,
@@ -206,7 +206,7 @@ class ContextBuilder:
         self.user_profiles.save_profile(user_id)
 
         # 生成新的会话ID
-        self.current_session_id = str(uuid.uuid4())
+        self.current_session_id = uuid.uuid4().hex
 
     def search_events(self, query: str, time_range: Optional[str] = None) -> List[str]:
         """
@@ -232,4 +232,4 @@ class ContextBuilder:
     def reset_session(self):
         """重置会话状态"""
         self.state.reset_session()
-        self.current_session_id = str(uuid.uuid4())
+        self.current_session_id = uuid.uuid4().hex
@@ -3,12 +3,22 @@
 """
 import json
 import os
+import time
 import uuid
 from datetime import datetime, date
+from operator import itemgetter
 from typing import List, Optional, Dict, Any
 
 from ..models.event import Event, EventType, DailySummary
 
+# 事件检索结果缓存有效期（秒），存储新事件时会主动失效
+EVENT_SEARCH_CACHE_TTL = 30.0
+# 事件检索缓存最多保留的条目数，防止长时间运行后无限增长
+EVENT_SEARCH_CACHE_MAX_ENTRIES = 128
+
+# 事件抽取时发送给 LLM 的对话文本上限（字符），超出时丢弃最早的对话
+EVENT_EXTRACTION_MAX_CHARS = 4000
+
 
 class EventLayer:
     """事件管理器"""
@@ -40,6 +50,9 @@ class EventLayer:
         # 内存中的今日事件缓存
         self._today_events: List[Event] = []
 
+        # 事件检索缓存: (query, time_range) -> (时间戳, 结果)
+        self._search_cache: Dict[tuple, tuple] = {}
+
         # 加载今日摘要
         self.today_summary = self._load_or_create_summary(date.today())
 
@@ -118,10 +131,16 @@ class EventLayer:
             return []
 
         # 构建对话文本
-        conv_text = ""
-        for conv in self._conversation_buffer[-10:]:  # 最近10条
-            conv_text += f"用户: {conv['user_input']}\n"
-            conv_text += f"助手: {conv['assistant_response']}\n\n"
+        # 从最新的对话往前取，累计长度超出预算即停止（至少保留最新一条）
+        parts = []
+        total = 0
+        for conv in reversed(self._conversation_buffer[-10:]):  # 最近10条
+            part = f"用户: {conv['user_input']}\n助手: {conv['assistant_response']}\n\n"
+            if parts and total + len(part) > EVENT_EXTRACTION_MAX_CHARS:
+                break
+            parts.append(part)
+            total += len(part)
+        conv_text = "".join(reversed(parts))
 
         prompt = f"""分析以下对话，提取值得记录的关键事件。
 
@@ -158,7 +177,7 @@ importance 范围：0.0-1.0（0.7以上为重要事件）"""
             for event_data in result.get("events", []):
                 user_id = self._conversation_buffer[-1]["user_id"] if self._conversation_buffer else "unknown"
                 event = Event(
-                    event_id=str(uuid.uuid4()),
+                    event_id=uuid.uuid4().hex,
                     event_type=EventType.from_string(event_data.get("type", "conversation")),
                     content=event_data.get("content", ""),
                     timestamp=datetime.now(),
@@ -192,6 +211,7 @@ importance 范围：0.0-1.0（0.7以上为重要事件）"""
                     "importance": event.importance
                 }
             )
+            self._search_cache.clear()
         except Exception as e:
             print(f"[EventLayer] 事件存储失败: {e}")
 
@@ -250,6 +270,11 @@ importance 范围：0.0-1.0（0.7以上为重要事件）"""
         if not self.mem0 or not hasattr(self.mem0, 'memory'):
             return []
 
+        cache_key = (query, time_range)
+        cached = self._search_cache.get(cache_key)
+        if cached and time.monotonic() - cached[0] < EVENT_SEARCH_CACHE_TTL:
+            return list(cached[1])
+
         # 构建包含时间信息的查询
         search_query = query
         if time_range:
@@ -262,15 +287,27 @@ importance 范围：0.0-1.0（0.7以上为重要事件）"""
                 limit=10
             )
 
-            if not results.get("results"):
-                return []
-
-            return [r["memory"] for r in results["results"]]
+            events = list(map(itemgetter("memory"), results.get("results") or []))
+            self._cache_search_result(cache_key, events)
+            return list(events)
 
         except Exception as e:
             print(f"[EventLayer] 事件搜索失败: {e}")
             return []
 
+    def _cache_search_result(self, cache_key: tuple, events: List[str]):
+        """写入检索缓存；条目数达到上限时先淘汰过期项，仍然满则丢弃最早写入的一项"""
+        cache = self._search_cache
+        now = time.monotonic()
+        cache.pop(cache_key, None)  # 重新插入到末尾，保持按写入时间排序
+        if len(cache) >= EVENT_SEARCH_CACHE_MAX_ENTRIES:
+            for key, (ts, _) in list(cache.items()):
+                if now - ts >= EVENT_SEARCH_CACHE_TTL:
+                    cache.pop(key, None)
+            if len(cache) >= EVENT_SEARCH_CACHE_MAX_ENTRIES:
+                cache.pop(next(iter(cache), None), None)
+        cache[cache_key] = (now, events)
+
     def save_summary(self):
         """保存今日摘要"""
         os.makedirs(self.summary_dir, exist_ok=True)
@@ -228,8 +228,9 @@ class LLMClient:
                 )
 
                 # 收集响应
-                accumulated_content = ""
+                content_parts = []
                 tool_calls = []
+                argument_parts = []  # 每个工具调用的参数片段，流结束后一次性拼接
                 current_tool_call = None
 
                 for chunk in response:
@@ -237,7 +238,7 @@ class LLMClient:
 
                     # 处理文本内容
                     if delta.content:
-                        accumulated_content += delta.content
+                        content_parts.append(delta.content)
                         yield {"type": "content", "data": delta.content}
 
                     # 处理工具调用
@@ -252,6 +253,7 @@ class LLMClient:
                                     "type": "function",
                                     "function": {"name": "", "arguments": ""}
                                 })
+                                argument_parts.append([])
 
                             if tool_call_delta.id:
                                 tool_calls[idx]["id"] = tool_call_delta.id
@@ -261,7 +263,10 @@ class LLMClient:
                                     tool_calls[idx]["function"]["name"] = tool_call_delta.function.name
 
                                 if tool_call_delta.function.arguments:
-                                    tool_calls[idx]["function"]["arguments"] += tool_call_delta.function.arguments
+                                    argument_parts[idx].append(tool_call_delta.function.arguments)
+
+                for tool_call, parts in zip(tool_calls, argument_parts):
+                    tool_call["function"]["arguments"] = "".join(parts)
 
                 # 检查是否有工具调用
                 if not tool_calls:
@@ -272,7 +277,7 @@ class LLMClient:
                 tool_call_count += 1
 
                 # 将助手的响应添加到消息历史
-                assistant_message = {"role": "assistant", "content": accumulated_content or None}
+                assistant_message = {"role": "assistant", "content": "".join(content_parts) or None}
 
                 # 如果有工具调用，添加到消息中
                 if tool_calls:
@@ -397,11 +402,11 @@ class LLMClient:
             stream=True
         )
 
-        full_content = ""
+        content_parts = []
         for chunk in response:
             if chunk.choices[0].delta.content:
                 text = chunk.choices[0].delta.content
-                full_content += text
+                content_parts.append(text)
                 yield text
 
-        return full_content
+        return "".join(content_parts)
@@ -6,7 +6,10 @@
 import os
 import sys
 import json
+import atexit
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
 
 from dotenv import load_dotenv
 
@@ -50,13 +53,21 @@ else:
     for h in root_logger.handlers:
         h.setLevel(_level)
 
+    # 日志记录只入队，由后台线程写出，音频/网络线程不会阻塞在 stdout 上
+    _log_queue = queue.SimpleQueue()
+    _log_listener = QueueListener(_log_queue, *root_logger.handlers, respect_handler_level=True)
+    root_logger.handlers = [QueueHandler(_log_queue)]
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
+
     # 常见噪声来源：HTTP 客户端、WebSocket、以及本项目的 memory_chat
     for name in ("httpx", "httpcore", "websocket", "websockets", "memory_chat"):
         logging.getLogger(name).setLevel(_level)
 
 
 class LLMTTSTest:
-    def __init__(self, config_path: str = "config/api_keys.json", role_config: dict = None, role_loader: RoleLoader = None):
+    def __init__(self, config_path: str = "config/api_keys.json", role_config: dict = None, role_loader: RoleLoader = None,
+                 config: dict = None):
         """
         初始化测试类
 
@@ -64,17 +75,20 @@ class LLMTTSTest:
             config_path: 配置文件路径
             role_config: 角色配置（从 role_loader 加载）
             role_loader: 角色加载器实例
+            config: 已加载的配置（调用方已用 ConfigLoader 加载过时传入，避免重复解析 .env 和 JSON）
         """
         self.role_loader = role_loader
         # 使用新的配置加载器
-        config_loader = ConfigLoader()
-        self.config = config_loader.get_config()
+        if config is None:
+            config = ConfigLoader().get_config()
+        self.config = config
 
         # 静默打印配置状态
         # config_loader.print_status()
 
         self.test_config = self._load_test_config()
         self.llm_client = None
+        self.volcengine_tts = None  # 跨轮次复用，保持 WebSocket 长连接
         self.output_dir = self.test_config.get("output_dir", "data/audios")
 
         # 初始化 Mem0 记忆管理器
@@ -209,13 +223,15 @@ class LLMTTSTest:
         for msg in self.voice_prompt.conversation_history:
             history.append(msg)
 
-        # 创建实时 TTS 客户端
-        config = self.config.get("volcengine_seed2", {})
-        realtime_tts = VolcengineRealtimeTTS(
-            app_id=config.get("app_id"),
-            access_token=config.get("access_token") or config.get("api_key"),
-            voice="zh_female_cancan_mars_bigtts"
-        )
+        # 复用实时 TTS 客户端（连接保持打开，避免每轮重新握手）
+        if self.volcengine_tts is None:
+            config = self.config.get("volcengine_seed2", {})
+            self.volcengine_tts = VolcengineRealtimeTTS(
+                app_id=config.get("app_id"),
+                access_token=config.get("access_token") or config.get("api_key"),
+                voice="zh_female_cancan_mars_bigtts"
+            )
+        realtime_tts = self.volcengine_tts
 
         # 创建流式播放器 - PyAudio
         streaming_player = PyAudioStreamPlayer(sample_rate=24000)
@@ -415,14 +431,20 @@ class LLMTTSTest:
 
             except KeyboardInterrupt:
                 print("\n\n👋 再见!")
-                # 确保正确关闭 Mem0 连接
-                if self.mem0_manager and self.mem0_manager.enabled:
-                    self.mem0_manager.close()
+                # 退出循环后统一关闭连接
                 break
             except Exception as e:
                 print(f"\n❌ 错误: {str(e)}\n")
 
         # 正常退出时也要关闭连接
+        self._close_connections()
+
+    def _close_connections(self):
+        """关闭 TTS 长连接，等待后台记忆存储完成后关闭 Mem0"""
+        if self.volcengine_tts:
+            self.volcengine_tts.disconnect()
+            self.volcengine_tts = None
+        self.memory_chat.close()
         if self.mem0_manager and self.mem0_manager.enabled:
             self.mem0_manager.close()
 
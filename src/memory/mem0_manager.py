@@ -1,6 +1,7 @@
 """
 Mem0 记忆管理器 - 为语音助手提供长期记忆能力
 """
+from operator import itemgetter
 from typing import List, Dict, Optional
 import os
 
@@ -117,9 +118,9 @@ class Mem0Manager:
                 print(f"[Mem0] 未找到相关记忆")
                 return ""
 
-            memories = [m["memory"] for m in results["results"]]
+            memories = list(map(itemgetter("memory"), results["results"]))
             print(f"[Mem0] 找到 {len(memories)} 条相关记忆")
-            return "\n".join(f"- {m}" for m in memories)
+            return "- " + "\n- ".join(memories)
 
         except Exception as e:
             print(f"⚠️  记忆检索失败: {e}")
@@ -10,13 +10,28 @@
 
 import json
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
 from typing import Optional, List, Dict, Any, Generator
 from dataclasses import dataclass, field
 from openai import OpenAI
 
+try:
+    # orjson 解析中文 JSON 更快，不可用时回退到标准库
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
+
 # 配置日志
 logger = logging.getLogger("memory_chat")
 
+# 记忆检索结果缓存有效期（秒），保存新记忆时会主动失效
+MEMORY_SEARCH_CACHE_TTL = 60.0
+# 记忆检索缓存最多保留的条目数（query 几乎不重复，需防止长时间运行后无限增长）
+MEMORY_SEARCH_CACHE_MAX_ENTRIES = 128
+
 
 # ============================================
 # 数据结构定义
@@ -179,6 +194,15 @@ class MemoryEnhancedChat:
         self.verbose = verbose
         self.context_builder = context_builder  # 新增
 
+        # 记忆检索缓存: (user_id, query) -> (时间戳, 结果)
+        self._search_cache: Dict[tuple, tuple] = {}
+        self._cache_generation = 0
+
+        # 存储 Hook 在后台执行，与检索/生成并行（单线程保证写入顺序）
+        self._save_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="memory_save")
+        # 后台存储与前台检索共用同一个 mem0 实例（向量库/SQLite 连接非线程安全），需串行访问
+        self._mem0_lock = threading.Lock()
+
         # 配置日志级别
         if verbose:
             logger.setLevel(logging.DEBUG)
@@ -205,12 +229,12 @@ class MemoryEnhancedChat:
             print(f"[分析] thinking: {analysis.thinking}")
             print(f"[分析] need_search: {analysis.need_memory_search}, save: {analysis.should_save_memory}")
 
-        logger.info(f"[分析] need_search={analysis.need_memory_search}, save={analysis.should_save_memory}")
-        logger.debug(f"[分析] thinking: {analysis.thinking}")
+        logger.info("[分析] need_search=%s, save=%s", analysis.need_memory_search, analysis.should_save_memory)
+        logger.debug("[分析] thinking: %s", analysis.thinking)
 
-        # ========== 处理存储（Hook）==========
+        # ========== 处理存储（Hook，后台执行）==========
         if analysis.should_save_memory and analysis.memory_to_save:
-            self._save_memory_hook(analysis.memory_to_save)
+            self._save_executor.submit(self._save_memory_hook, analysis.memory_to_save, self.user_id)
 
         # ========== 处理检索 ==========
         retrieved_memories = ""
@@ -221,8 +245,8 @@ class MemoryEnhancedChat:
                 print(f"[检索] query: {analysis.memory_search_query}")
                 print(f"[检索] 结果: {retrieved_memories}")
 
-            logger.info(f"[检索] query={analysis.memory_search_query}")
-            logger.info(f"[检索] 结果: {retrieved_memories}")
+            logger.info("[检索] query=%s", analysis.memory_search_query)
+            logger.info("[检索] 结果: %s", retrieved_memories)
 
         # ========== 第二阶段：生成回复 ==========
         final_response = self._generate_response(
@@ -249,17 +273,17 @@ class MemoryEnhancedChat:
         # ========== 第一阶段：意图分析（非流式）==========
         analysis = self._analyze_intent(user_input, history)
 
-        logger.info(f"[分析] need_search={analysis.need_memory_search}, save={analysis.should_save_memory}")
+        logger.info("[分析] need_search=%s, save=%s", analysis.need_memory_search, analysis.should_save_memory)
 
-        # ========== 处理存储（Hook）==========
+        # ========== 处理存储（Hook，后台执行）==========
         if analysis.should_save_memory and analysis.memory_to_save:
-            self._save_memory_hook(analysis.memory_to_save)
+            self._save_executor.submit(self._save_memory_hook, analysis.memory_to_save, self.user_id)
 
         # ========== 处理检索 ==========
         retrieved_memories = ""
         if analysis.need_memory_search and analysis.memory_search_query:
             retrieved_memories = self._search_memories(analysis.memory_search_query)
-            logger.info(f"[检索] query={analysis.memory_search_query}, 结果: {retrieved_memories}")
+            logger.info("[检索] query=%s, 结果: %s", analysis.memory_search_query, retrieved_memories)
 
         # ========== 第二阶段：流式生成回复 ==========
         yield from self._generate_response_stream(
@@ -303,7 +327,7 @@ class MemoryEnhancedChat:
 
             # 解析结果
             content = response.choices[0].message.content
-            data = json.loads(content)
+            data = json_loads(content)
 
             # 解析 memory_to_save
             memory_to_save = None
@@ -366,7 +390,7 @@ class MemoryEnhancedChat:
             )
 
             content = response.choices[0].message.content
-            data = json.loads(content)
+            data = json_loads(content)
 
             return FinalResponse(response=data.get("response", ""))
 
@@ -423,42 +447,73 @@ class MemoryEnhancedChat:
             )
 
             for chunk in response:
-                if chunk.choices[0].delta.content:
-                    yield chunk.choices[0].delta.content
+                content = chunk.choices[0].delta.content
+                if content:
+                    yield content
 
         except Exception as e:
             logger.error(f"[流式回复错误] {e}")
             yield f"抱歉，出现了一些问题: {e}"
 
     def _search_memories(self, query: str) -> str:
-        """检索记忆"""
+        """检索记忆（带 TTL 缓存，避免重复请求 embedding 和向量库）"""
         if not self.mem0 or not self.mem0.enabled:
             return ""
 
+        cache_key = (self.user_id, query)
+        cached = self._search_cache.get(cache_key)
+        if cached and time.monotonic() - cached[0] < MEMORY_SEARCH_CACHE_TTL:
+            logger.debug("[检索] 命中缓存 query=%s", query)
+            return cached[1]
+        generation = self._cache_generation
+
         try:
-            results = self.mem0.memory.search(
-                query=query,
-                user_id=self.user_id,
-                limit=5
-            )
+            with self._mem0_lock:
+                results = self.mem0.memory.search(
+                    query=query,
+                    user_id=self.user_id,
+                    limit=5
+                )
 
             if not results.get("results"):
-                logger.info(f"[检索] 未找到相关记忆")
-                return ""
+                logger.info("[检索] 未找到相关记忆")
+                retrieved = ""
+            else:
+                memories = map(itemgetter("memory"), results["results"])
+                retrieved = "• " + "\n• ".join(memories)
 
-            memories = [f"• {r['memory']}" for r in results["results"]]
-            return "\n".join(memories)
+            # 检索期间如有新记忆写入，结果可能已过时，不再缓存
+            if generation == self._cache_generation:
+                self._cache_search_result(cache_key, retrieved)
+            return retrieved
 
         except Exception as e:
             logger.error(f"[检索错误] {e}")
             return ""
 
-    def _save_memory_hook(self, memory_item: MemoryItem):
+    def _cache_search_result(self, cache_key: tuple, retrieved: str):
+        """写入检索缓存；条目数达到上限时先淘汰过期项，仍然满则丢弃最早写入的一项"""
+        cache = self._search_cache
+        now = time.monotonic()
+        cache.pop(cache_key, None)  # 重新插入到末尾，保持按写入时间排序
+        if len(cache) >= MEMORY_SEARCH_CACHE_MAX_ENTRIES:
+            # 后台存储线程可能同时 clear()，先取快照再删除
+            for key, (ts, _) in list(cache.items()):
+                if now - ts >= MEMORY_SEARCH_CACHE_TTL:
+                    cache.pop(key, None)
+            if len(cache) >= MEMORY_SEARCH_CACHE_MAX_ENTRIES:
+                cache.pop(next(iter(cache), None), None)
+        cache[cache_key] = (now, retrieved)
+
+    def _save_memory_hook(self, memory_item: MemoryItem, user_id: Optional[str] = None):
         """
         存储 Hook
 
-        保存记忆到 Mem0，结果写入日志
+        保存记忆到 Mem0，结果写入日志。由后台线程调用，
+        user_id 在提交时确定，避免执行前切换用户导致写错对象。
         """
+        user_id = user_id or self.user_id
+
         if not self.mem0 or not self.mem0.enabled:
             logger.warning("[存储] Mem0 未启用")
             return
@@ -471,17 +526,22 @@ class MemoryEnhancedChat:
             memory_content = f"User memory - {memory_item.content}"
 
             # 调用 mem0 保存（不传 enable_graph，由 Mem0Manager 配置决定）
-            result = self.mem0.memory.add(
-                memory_content,
-                user_id=self.user_id
-            )
+            with self._mem0_lock:
+                result = self.mem0.memory.add(
+                    memory_content,
+                    user_id=user_id
+                )
+
+                # 强制刷新到磁盘
+                self.mem0._flush_to_disk()
 
-            # 强制刷新到磁盘
-            self.mem0._flush_to_disk()
+            # 新记忆写入后，旧的检索结果不再可靠
+            self._cache_generation += 1
+            self._search_cache.clear()
 
             # 结果写入日志
-            logger.info(f"[存储成功] type={memory_item.type}, content={memory_item.content}")
-            logger.debug(f"[存储详情] {result}")
+            logger.info("[存储成功] type=%s, content=%s", memory_item.type, memory_item.content)
+            logger.debug("[存储详情] %s", result)
 
             if self.verbose:
                 print(f"[存储] type={memory_item.type}, content={memory_item.content}")
@@ -489,6 +549,10 @@ class MemoryEnhancedChat:
         except Exception as e:
             logger.error(f"[存储失败] {e}")
 
+    def close(self):
+        """等待后台存储任务完成（应在关闭 Mem0 之前调用）"""
+        self._save_executor.shutdown(wait=True)
+
     def on_conversation_turn(
         self,
         user_input: str,
@@ -61,6 +61,7 @@ class RealtimeStreamingPipeline:
         # 从 LLM 读取文本并实时发送到 TTS
         full_text = []
         interrupted = False
+        next_send_time = 0.0  # 下一次允许发送的时间（按截止时间节流，不累积延迟）
         try:
             for chunk in llm_stream:
                 # 检查是否被打断
@@ -77,11 +78,16 @@ class RealtimeStreamingPipeline:
 
                 full_text.append(chunk)
 
+                # 小间隔，避免发送过快：只在距上次发送不足 10ms 时补足差值，
+                # LLM 本身输出较慢时不再额外等待
+                now = time.monotonic()
+                if now < next_send_time:
+                    time.sleep(next_send_time - now)
+                    now = next_send_time
+
                 # 实时发送到 TTS（Prompt 已经控制不输出格式符号）
                 realtime_tts_client.send_text(chunk)
-
-                # 小延迟，避免发送过快
-                time.sleep(0.01)
+                next_send_time = now + 0.01
 
         except Exception as e:
             print(f'\n❌ 错误: {e}')
@@ -3,12 +3,17 @@ import logging
 import struct
 from dataclasses import dataclass
 from enum import IntEnum
-from typing import Callable, List
+from functools import lru_cache
+from typing import Callable, Tuple
 
 import websockets
 
 logger = logging.getLogger(__name__)
 
+# Precompiled big-endian 32-bit field codecs (avoid format-string lookup per field)
+_INT32 = struct.Struct(">i")
+_UINT32 = struct.Struct(">I")
+
 
 class MsgType(IntEnum):
     """Message type enumeration"""
@@ -150,9 +155,36 @@ class EventType(IntEnum):
         return self.name if self.name else f"EventType({self.value})"
 
 
-@dataclass
+# Message types that may carry a sequence number
+_SEQUENCED_TYPES = frozenset({
+    MsgType.FullClientRequest,
+    MsgType.FullServerResponse,
+    MsgType.FrontEndResultServer,
+    MsgType.AudioOnlyClient,
+    MsgType.AudioOnlyServer,
+})
+_SEQUENCE_FLAGS = frozenset({MsgTypeFlagBits.PositiveSeq, MsgTypeFlagBits.NegativeSeq})
+
+# Connection-level events without a session ID field
+_NO_SESSION_ID_WRITE_EVENTS = frozenset({
+    EventType.StartConnection,
+    EventType.FinishConnection,
+    EventType.ConnectionStarted,
+    EventType.ConnectionFailed,
+})
+_NO_SESSION_ID_READ_EVENTS = _NO_SESSION_ID_WRITE_EVENTS | {EventType.ConnectionFinished}
+
+# Events carrying a connection ID field
+_CONNECT_ID_EVENTS = frozenset({
+    EventType.ConnectionStarted,
+    EventType.ConnectionFailed,
+    EventType.ConnectionFinished,
+})
+
+
+@dataclass(slots=True)
 class Message:
-    """Message object
+    """Message object (one per WebSocket frame; __slots__ avoids a per-instance __dict__)
 
     Message format:
     0                 1                 2                 3
@@ -211,23 +243,15 @@ class Message:
         """Serialize message to bytes"""
         buffer = io.BytesIO()
 
-        # Write header
-        header = [
-            (self.version << 4) | self.header_size,
-            (self.type << 4) | self.flag,
-            (self.serialization << 4) | self.compression,
-        ]
-
-        header_size = 4 * self.header_size
-        if padding := header_size - len(header):
-            header.extend([0] * padding)
-
-        buffer.write(bytes(header))
+        # Write header (precomputed per field combination)
+        buffer.write(_header_bytes(
+            self.version, self.header_size, self.type,
+            self.flag, self.serialization, self.compression,
+        ))
 
         # Write other fields
-        writers = self._get_writers()
-        for writer in writers:
-            writer(buffer)
+        for writer in self._get_writers():
+            writer(self, buffer)
 
         return buffer.getvalue()
 
@@ -255,95 +279,40 @@ class Message:
             buffer.read(padding_size)
 
         # Read other fields
-        readers = self._get_readers()
-        for reader in readers:
-            reader(buffer)
+        for reader in self._get_readers():
+            reader(self, buffer)
 
         # Check for remaining data
         remaining = buffer.read()
         if remaining:
             raise ValueError(f"Unexpected data after message: {remaining}")
 
-    def _get_writers(self) -> List[Callable[[io.BytesIO], None]]:
-        """Get list of writer functions"""
-        writers = []
-
-        if self.flag == MsgTypeFlagBits.WithEvent:
-            writers.extend([self._write_event, self._write_session_id])
-
-        if self.type in [
-            MsgType.FullClientRequest,
-            MsgType.FullServerResponse,
-            MsgType.FrontEndResultServer,
-            MsgType.AudioOnlyClient,
-            MsgType.AudioOnlyServer,
-        ]:
-            if self.flag in [MsgTypeFlagBits.PositiveSeq, MsgTypeFlagBits.NegativeSeq]:
-                writers.append(self._write_sequence)
-        elif self.type == MsgType.Error:
-            writers.append(self._write_error_code)
-        else:
-            raise ValueError(f"Unsupported message type: {self.type}")
-
-        writers.append(self._write_payload)
-        return writers
-
-    def _get_readers(self) -> List[Callable[[io.BytesIO], None]]:
-        """Get list of reader functions"""
-        readers = []
-
-        if self.type in [
-            MsgType.FullClientRequest,
-            MsgType.FullServerResponse,
-            MsgType.FrontEndResultServer,
-            MsgType.AudioOnlyClient,
-            MsgType.AudioOnlyServer,
-        ]:
-            if self.flag in [MsgTypeFlagBits.PositiveSeq, MsgTypeFlagBits.NegativeSeq]:
-                readers.append(self._read_sequence)
-        elif self.type == MsgType.Error:
-            readers.append(self._read_error_code)
-        else:
-            raise ValueError(f"Unsupported message type: {self.type}")
-
-        if self.flag == MsgTypeFlagBits.WithEvent:
-            readers.extend(
-                [self._read_event, self._read_session_id, self._read_connect_id]
-            )
+    def _get_writers(self) -> Tuple[Callable[["Message", io.BytesIO], None], ...]:
+        """Get writer functions (precomputed per type/flag, called as writer(self, buffer))"""
+        return _writer_table(self.type, self.flag)
 
-        readers.append(self._read_payload)
-        return readers
+    def _get_readers(self) -> Tuple[Callable[["Message", io.BytesIO], None], ...]:
+        """Get reader functions (precomputed per type/flag, called as reader(self, buffer))"""
+        return _reader_table(self.type, self.flag)
 
     def _write_event(self, buffer: io.BytesIO) -> None:
         """Write event"""
-        buffer.write(struct.pack(">i", self.event))
+        buffer.write(_INT32.pack(self.event))
 
     def _write_session_id(self, buffer: io.BytesIO) -> None:
         """Write session ID"""
-        if self.event in [
-            EventType.StartConnection,
-            EventType.FinishConnection,
-            EventType.ConnectionStarted,
-            EventType.ConnectionFailed,
-        ]:
+        if self.event in _NO_SESSION_ID_WRITE_EVENTS:
             return
 
-        session_id_bytes = self.session_id.encode("utf-8")
-        size = len(session_id_bytes)
-        if size > 0xFFFFFFFF:
-            raise ValueError(f"Session ID size ({size}) exceeds max(uint32)")
-
-        buffer.write(struct.pack(">I", size))
-        if size > 0:
-            buffer.write(session_id_bytes)
+        buffer.write(_session_id_field(self.session_id))
 
     def _write_sequence(self, buffer: io.BytesIO) -> None:
         """Write sequence number"""
-        buffer.write(struct.pack(">i", self.sequence))
+        buffer.write(_INT32.pack(self.sequence))
 
     def _write_error_code(self, buffer: io.BytesIO) -> None:
         """Write error code"""
-        buffer.write(struct.pack(">I", self.error_code))
+        buffer.write(_UINT32.pack(self.error_code))
 
     def _write_payload(self, buffer: io.BytesIO) -> None:
         """Write payload"""
@@ -351,29 +320,23 @@ class Message:
         if size > 0xFFFFFFFF:
             raise ValueError(f"Payload size ({size}) exceeds max(uint32)")
 
-        buffer.write(struct.pack(">I", size))
+        buffer.write(_UINT32.pack(size))
         buffer.write(self.payload)
 
     def _read_event(self, buffer: io.BytesIO) -> None:
         """Read event"""
         event_bytes = buffer.read(4)
         if event_bytes:
-            self.event = EventType(struct.unpack(">i", event_bytes)[0])
+            self.event = EventType(_INT32.unpack(event_bytes)[0])
 
     def _read_session_id(self, buffer: io.BytesIO) -> None:
         """Read session ID"""
-        if self.event in [
-            EventType.StartConnection,
-            EventType.FinishConnection,
-            EventType.ConnectionStarted,
-            EventType.ConnectionFailed,
-            EventType.ConnectionFinished,
-        ]:
+        if self.event in _NO_SESSION_ID_READ_EVENTS:
             return
 
         size_bytes = buffer.read(4)
         if size_bytes:
-            size = struct.unpack(">I", size_bytes)[0]
+            size = _UINT32.unpack(size_bytes)[0]
             if size > 0:
                 session_id_bytes = buffer.read(size)
                 if len(session_id_bytes) == size:
@@ -381,14 +344,10 @@ class Message:
 
     def _read_connect_id(self, buffer: io.BytesIO) -> None:
         """Read connection ID"""
-        if self.event in [
-            EventType.ConnectionStarted,
-            EventType.ConnectionFailed,
-            EventType.ConnectionFinished,
-        ]:
+        if self.event in _CONNECT_ID_EVENTS:
             size_bytes = buffer.read(4)
             if size_bytes:
-                size = struct.unpack(">I", size_bytes)[0]
+                size = _UINT32.unpack(size_bytes)[0]
                 if size > 0:
                     self.connect_id = buffer.read(size).decode("utf-8")
 
@@ -396,19 +355,19 @@ class Message:
         """Read sequence number"""
         sequence_bytes = buffer.read(4)
         if sequence_bytes:
-            self.sequence = struct.unpack(">i", sequence_bytes)[0]
+            self.sequence = _INT32.unpack(sequence_bytes)[0]
 
     def _read_error_code(self, buffer: io.BytesIO) -> None:
         """Read error code"""
         error_code_bytes = buffer.read(4)
         if error_code_bytes:
-            self.error_code = struct.unpack(">I", error_code_bytes)[0]
+            self.error_code = _UINT32.unpack(error_code_bytes)[0]
 
     def _read_payload(self, buffer: io.BytesIO) -> None:
         """Read payload"""
         size_bytes = buffer.read(4)
         if size_bytes:
-            size = struct.unpack(">I", size_bytes)[0]
+            size = _UINT32.unpack(size_bytes)[0]
             if size > 0:
                 self.payload = buffer.read(size)
 
@@ -426,16 +385,92 @@ class Message:
             return f"MsgType: {self.type}, EventType:{self.event}, Payload: {self.payload.decode('utf-8', 'ignore')}"
 
 
+@lru_cache(maxsize=8)
+def _session_id_field(session_id: str) -> bytes:
+    """Encode the length-prefixed session ID once per session (reused by every frame it sends)"""
+    session_id_bytes = session_id.encode("utf-8")
+    size = len(session_id_bytes)
+    if size > 0xFFFFFFFF:
+        raise ValueError(f"Session ID size ({size}) exceeds max(uint32)")
+
+    return _UINT32.pack(size) + session_id_bytes
+
+
+@lru_cache(maxsize=None)
+def _header_bytes(
+    version: VersionBits,
+    header_size: HeaderSizeBits,
+    msg_type: MsgType,
+    flag: MsgTypeFlagBits,
+    serialization: SerializationBits,
+    compression: CompressionBits,
+) -> bytes:
+    """Build the fixed header bytes for a field combination once"""
+    header = [
+        (version << 4) | header_size,
+        (msg_type << 4) | flag,
+        (serialization << 4) | compression,
+    ]
+
+    if padding := 4 * header_size - len(header):
+        header.extend([0] * padding)
+
+    return bytes(header)
+
+
+@lru_cache(maxsize=None)
+def _writer_table(msg_type: MsgType, flag: MsgTypeFlagBits) -> Tuple[Callable, ...]:
+    """Build the field writer sequence for a message type/flag combination once"""
+    writers = []
+
+    if flag == MsgTypeFlagBits.WithEvent:
+        writers.extend([Message._write_event, Message._write_session_id])
+
+    if msg_type in _SEQUENCED_TYPES:
+        if flag in _SEQUENCE_FLAGS:
+            writers.append(Message._write_sequence)
+    elif msg_type == MsgType.Error:
+        writers.append(Message._write_error_code)
+    else:
+        raise ValueError(f"Unsupported message type: {msg_type}")
+
+    writers.append(Message._write_payload)
+    return tuple(writers)
+
+
+@lru_cache(maxsize=None)
+def _reader_table(msg_type: MsgType, flag: MsgTypeFlagBits) -> Tuple[Callable, ...]:
+    """Build the field reader sequence for a message type/flag combination once"""
+    readers = []
+
+    if msg_type in _SEQUENCED_TYPES:
+        if flag in _SEQUENCE_FLAGS:
+            readers.append(Message._read_sequence)
+    elif msg_type == MsgType.Error:
+        readers.append(Message._read_error_code)
+    else:
+        raise ValueError(f"Unsupported message type: {msg_type}")
+
+    if flag == MsgTypeFlagBits.WithEvent:
+        readers.extend(
+            [Message._read_event, Message._read_session_id, Message._read_connect_id]
+        )
+
+    readers.append(Message._read_payload)
+    return tuple(readers)
+
+
 async def receive_message(websocket: websockets.WebSocketClientProtocol) -> Message:
     """Receive message from websocket"""
     try:
         data = await websocket.recv()
-        if isinstance(data, str):
-            raise ValueError(f"Unexpected text message: {data}")
-        elif isinstance(data, bytes):
+        # 二进制帧是常态，放在第一个分支，每帧只做一次类型判断
+        if type(data) is bytes:
             msg = Message.from_bytes(data)
-            logger.info(f"Received: {msg}")
+            logger.info("Received: %s", msg)
             return msg
+        elif isinstance(data, str):
+            raise ValueError(f"Unexpected text message: {data}")
         else:
             raise ValueError(f"Unexpected message type: {type(data)}")
     except Exception as e:
@@ -463,7 +498,7 @@ async def full_client_request(
     """Send full client message"""
     msg = Message(type=MsgType.FullClientRequest, flag=MsgTypeFlagBits.NoSeq)
     msg.payload = payload
-    logger.info(f"Sending: {msg}")
+    logger.info("Sending: %s", msg)
     await websocket.send(msg.marshal())
 
 
@@ -473,7 +508,7 @@ async def audio_only_client(
     """Send audio-only client message"""
     msg = Message(type=MsgType.AudioOnlyClient, flag=flag)
     msg.payload = payload
-    logger.info(f"Sending: {msg}")
+    logger.info("Sending: %s", msg)
     await websocket.send(msg.marshal())
 
 
@@ -482,7 +517,7 @@ async def start_connection(websocket: websockets.WebSocketClientProtocol) -> Non
     msg = Message(type=MsgType.FullClientRequest, flag=MsgTypeFlagBits.WithEvent)
     msg.event = EventType.StartConnection
     msg.payload = b"{}"
-    logger.info(f"Sending: {msg}")
+    logger.info("Sending: %s", msg)
     await websocket.send(msg.marshal())
 
 
@@ -491,7 +526,7 @@ async def finish_connection(websocket: websockets.WebSocketClientProtocol) -> No
     msg = Message(type=MsgType.FullClientRequest, flag=MsgTypeFlagBits.WithEvent)
     msg.event = EventType.FinishConnection
     msg.payload = b"{}"
-    logger.info(f"Sending: {msg}")
+    logger.info("Sending: %s", msg)
     await websocket.send(msg.marshal())
 
 
@@ -503,7 +538,7 @@ async def start_session(
     msg.event = EventType.StartSession
     msg.session_id = session_id
     msg.payload = payload
-    logger.info(f"Sending: {msg}")
+    logger.info("Sending: %s", msg)
     await websocket.send(msg.marshal())
 
 
@@ -515,7 +550,7 @@ async def finish_session(
     msg.event = EventType.FinishSession
     msg.session_id = session_id
     msg.payload = b"{}"
-    logger.info(f"Sending: {msg}")
+    logger.info("Sending: %s", msg)
     await websocket.send(msg.marshal())
 
 
@@ -527,7 +562,7 @@ async def cancel_session(
     msg.event = EventType.CancelSession
     msg.session_id = session_id
     msg.payload = b"{}"
-    logger.info(f"Sending: {msg}")
+    logger.info("Sending: %s", msg)
     await websocket.send(msg.marshal())
 
 
@@ -539,5 +574,5 @@ async def task_request(
     msg.event = EventType.TaskRequest
     msg.session_id = session_id
     msg.payload = payload
-    logger.info(f"Sending: {msg}")
+    logger.info("Sending: %s", msg)
     await websocket.send(msg.marshal())
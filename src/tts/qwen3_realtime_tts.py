@@ -4,8 +4,8 @@ Qwen3 实时 TTS 客户端 - 支持流式文本输入和流式音频输出
 """
 import os
 import base64
-import threading
 import queue
+import threading
 import time
 import dashscope
 from dashscope.audio.qwen_tts_realtime import (
@@ -14,11 +14,13 @@ from dashscope.audio.qwen_tts_realtime import (
     AudioFormat
 )
 
+from src.audio.audio_ring import AudioRingBuffer
+
 
 class RealtimeTTSCallback(QwenTtsRealtimeCallback):
     """实时 TTS 回调处理器"""
 
-    def __init__(self, audio_queue: queue.Queue, verbose: bool = False):
+    def __init__(self, audio_queue: AudioRingBuffer, verbose: bool = False):
         """
         Args:
             audio_queue: 音频数据队列，用于传递给播放器
@@ -30,6 +32,14 @@ class RealtimeTTSCallback(QwenTtsRealtimeCallback):
         self.first_audio_received = False
         self.start_time = None
         self.verbose = verbose
+        # 事件类型 -> 处理方法
+        self._event_handlers = {
+            'response.audio.delta': self._on_audio_delta,
+            'session.created': self._on_session_created,
+            'response.done': self._on_response_done,
+            'session.finished': self._on_session_finished,
+            'error': self._on_error,
+        }
 
     def on_open(self) -> None:
         """连接建立"""
@@ -41,48 +51,60 @@ class RealtimeTTSCallback(QwenTtsRealtimeCallback):
         """连接关闭"""
         if self.verbose:
             print(f'[实时TTS] 连接关闭: code={close_status_code}, msg={close_msg}')
-        self.audio_queue.put(None)  # 结束信号
+        self.audio_queue.close()  # 结束信号（不占槽位，缓冲区满时也不会阻塞 SDK 回调线程）
 
     def on_event(self, response: dict) -> None:
-        """处理服务端事件"""
+        """处理服务端事件（按事件类型查表分发，音频块不再逐个比较 if/elif 分支）"""
         try:
-            event_type = response.get('type')
+            handler = self._event_handlers.get(response.get('type'))
+            if handler:
+                handler(response)
+        except Exception as e:
+            if self.verbose:
+                print(f'[实时TTS] 事件处理错误: {e}')
 
-            if event_type == 'session.created':
-                self.session_id = response['session']['id']
-                if self.verbose:
-                    print(f'[实时TTS] 会话创建: {self.session_id}')
-
-            elif event_type == 'response.audio.delta':
-                # 接收音频数据块
-                audio_b64 = response.get('delta', '')
-                if audio_b64:
-                    audio_bytes = base64.b64decode(audio_b64)
-                    self.audio_queue.put(audio_bytes)
-
-                    if not self.first_audio_received:
-                        self.first_audio_received = True
-                        if self.verbose:
-                            delay = time.time() - self.start_time
-                            print(f'[实时TTS] 首个音频块延迟: {delay:.3f}秒')
-
-            elif event_type == 'response.done':
+    def _on_session_created(self, response: dict) -> None:
+        self.session_id = response['session']['id']
+        if self.verbose:
+            print(f'[实时TTS] 会话创建: {self.session_id}')
+
+    def _on_audio_delta(self, response: dict) -> None:
+        # 接收音频数据块
+        audio_b64 = response.get('delta', '')
+        if audio_b64:
+            audio_bytes = base64.b64decode(audio_b64)
+            audio_queue = self.audio_queue
+            try:
+                audio_queue.put_nowait(audio_bytes)
+            except queue.Full:
+                # 播放跟不上时分段等待空位；会话结束或缓冲区被关闭（打断）即放弃，
+                # 避免播放器停止读取后 SDK 回调线程一直阻塞
+                while not self.complete_event.is_set() and not audio_queue.closed:
+                    try:
+                        audio_queue.put(audio_bytes, 0.5)
+                        break
+                    except queue.Full:
+                        continue
+
+            if not self.first_audio_received:
+                self.first_audio_received = True
                 if self.verbose:
-                    response_id = response.get('response', {}).get('id', 'unknown')
-                    print(f'[实时TTS] 响应完成: {response_id}')
+                    delay = time.time() - self.start_time
+                    print(f'[实时TTS] 首个音频块延迟: {delay:.3f}秒')
 
-            elif event_type == 'session.finished':
-                if self.verbose:
-                    print('[实时TTS] 会话结束')
-                self.complete_event.set()
+    def _on_response_done(self, response: dict) -> None:
+        if self.verbose:
+            response_id = response.get('response', {}).get('id', 'unknown')
+            print(f'[实时TTS] 响应完成: {response_id}')
 
-            elif event_type == 'error':
-                error = response.get('error', {})
-                print(f'[实时TTS] 错误: {error}')
+    def _on_session_finished(self, response: dict) -> None:
+        if self.verbose:
+            print('[实时TTS] 会话结束')
+        self.complete_event.set()
 
-        except Exception as e:
-            if self.verbose:
-                print(f'[实时TTS] 事件处理错误: {e}')
+    def _on_error(self, response: dict) -> None:
+        error = response.get('error', {})
+        print(f'[实时TTS] 错误: {error}')
 
     def wait_for_finished(self, timeout=None):
         """等待会话完成"""
@@ -122,7 +144,7 @@ class Qwen3RealtimeTTS:
 
     def start_session(self, mode: str = "server_commit",
                      audio_format: str = "pcm",
-                     sample_rate: int = 24000) -> queue.Queue:
+                     sample_rate: int = 24000) -> AudioRingBuffer:
         """
         启动实时 TTS 会话
 
@@ -134,8 +156,8 @@ class Qwen3RealtimeTTS:
         Returns:
             音频数据队列
         """
-        # 创建音频队列
-        self.audio_queue = queue.Queue()
+        # 创建音频缓冲区（SDK 回调线程写入，播放器读取）
+        self.audio_queue = AudioRingBuffer()
 
         # 创建回调
         callback = RealtimeTTSCallback(self.audio_queue, verbose=self.verbose)
@@ -197,6 +219,13 @@ class Qwen3RealtimeTTS:
             if self.verbose:
                 print('[实时TTS] 会话结束信号已发送')
 
+    def clear_queue(self):
+        """清空音频队列（用于打断）"""
+        if self.audio_queue:
+            # 打断线程既不是生产者也不是消费者：丢弃未播放的数据并发出结束信号
+            self.audio_queue.clear()
+            self.audio_queue.close()
+
     def wait_for_completion(self, timeout=None):
         """等待会话完成"""
         if self.client and hasattr(self.client, 'callback'):
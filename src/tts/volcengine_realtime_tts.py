@@ -4,10 +4,10 @@
 """
 import asyncio
 import json
+import queue
 import uuid
 import websockets
 import threading
-import queue
 import time
 import sys
 import os
@@ -17,8 +17,27 @@ import logging
 # 这些信息（如 "websocket closed due to fin=1 opcode=8"）会干扰 LLM 的输出
 logging.getLogger("websockets").setLevel(logging.WARNING)
 
+try:
+    # orjson 直接输出 UTF-8 字节，省去 dumps + encode 两步
+    import orjson
+
+    def _json_bytes(obj) -> bytes:
+        return orjson.dumps(obj)
+except ImportError:
+    def _json_bytes(obj) -> bytes:
+        return json.dumps(obj).encode()
+
+try:
+    # uvloop（libuv 实现）的事件循环调度开销更低；未安装（或 Windows）时使用标准 asyncio
+    import uvloop
+    _new_event_loop = uvloop.new_event_loop
+except ImportError:
+    _new_event_loop = asyncio.new_event_loop
+
 sys.path.append("src/tts/protocols")
 
+from src.audio.audio_ring import AudioRingBuffer
+
 from protocols import (
     EventType,
     MsgType,
@@ -32,6 +51,12 @@ from protocols import (
 )
 
 
+# 请求中不随文本变化的附加参数，只序列化一次
+_ADDITIONS = json.dumps({
+    "disable_markdown_filter": False,
+})
+
+
 class VolcengineRealtimeTTS:
     """火山引擎实时 TTS 客户端"""
 
@@ -54,6 +79,10 @@ class VolcengineRealtimeTTS:
         self.audio_queue = None
         self.is_connected = False
         self.is_session_active = False
+        self.uid = str(uuid.uuid4())
+        self._base_request = None  # 基础请求体（只依赖音色，跨会话复用），send_text 只替换 text
+        self._base_voice = None  # 构建 _base_request 时的音色
+        self._start_session_payload = None  # StartSession 请求的序列化结果
 
         self.first_audio_received = False
         self.start_time = None
@@ -62,6 +91,7 @@ class VolcengineRealtimeTTS:
         # 事件循环
         self.loop = None
         self.loop_thread = None
+        self._loop_ready = threading.Event()
 
     def get_resource_id(self) -> str:
         """获取 Resource ID"""
@@ -76,18 +106,20 @@ class VolcengineRealtimeTTS:
 
     def _run_event_loop(self):
         """在独立线程中运行事件循环"""
-        self.loop = asyncio.new_event_loop()
+        self.loop = _new_event_loop()
         asyncio.set_event_loop(self.loop)
+        # 循环真正开始运行后再通知启动方
+        self.loop.call_soon(self._loop_ready.set)
         self.loop.run_forever()
 
     def _start_event_loop(self):
         """启动事件循环线程"""
         if self.loop_thread is None or not self.loop_thread.is_alive():
+            self._loop_ready.clear()
             self.loop_thread = threading.Thread(target=self._run_event_loop, daemon=True)
             self.loop_thread.start()
             # 等待循环启动
-            while self.loop is None:
-                time.sleep(0.01)
+            self._loop_ready.wait()
 
     def _run_coroutine(self, coro):
         """在事件循环中运行协程"""
@@ -122,31 +154,33 @@ class VolcengineRealtimeTTS:
 
     async def _start_session_async(self):
         """异步启动会话"""
-        base_request = {
-            "user": {
-                "uid": str(uuid.uuid4()),
-            },
-            "namespace": "BidirectionalTTS",
-            "req_params": {
-                "speaker": self.voice,
-                "audio_params": {
-                    "format": "pcm",  # 使用 PCM 格式避免电流声（MP3 格式会导致播放器解析错误）
-                    "sample_rate": 24000,
-                    "enable_timestamp": True,
+        # 请求体只依赖音色，音色不变时复用上一轮构建和序列化的结果
+        if self._base_request is None or self._base_voice != self.voice:
+            self._base_request = {
+                "user": {
+                    "uid": self.uid,
                 },
-                "additions": json.dumps({
-                    "disable_markdown_filter": False,
-                }),
-            },
-        }
+                "namespace": "BidirectionalTTS",
+                "req_params": {
+                    "speaker": self.voice,
+                    "audio_params": {
+                        "format": "pcm",  # 使用 PCM 格式避免电流声（MP3 格式会导致播放器解析错误）
+                        "sample_rate": 24000,
+                        "enable_timestamp": True,
+                    },
+                    "additions": _ADDITIONS,
+                },
+            }
+            self._start_session_payload = _json_bytes(
+                {**self._base_request, "event": EventType.StartSession}
+            )
+            self._base_voice = self.voice
 
-        start_session_request = base_request.copy()
-        start_session_request["event"] = EventType.StartSession
         self.session_id = str(uuid.uuid4())
 
         await start_session(
             self.websocket,
-            json.dumps(start_session_request).encode(),
+            self._start_session_payload,
             self.session_id
         )
         await wait_for_event(
@@ -161,78 +195,87 @@ class VolcengineRealtimeTTS:
         if not self.is_session_active:
             raise RuntimeError("会话未启动")
 
-        base_request = {
-            "user": {
-                "uid": str(uuid.uuid4()),
-            },
-            "namespace": "BidirectionalTTS",
-            "req_params": {
-                "speaker": self.voice,
-                "audio_params": {
-                    "format": "pcm",  # 使用 PCM 格式避免电流声（MP3 格式会导致播放器解析错误）
-                    "sample_rate": 24000,
-                    "enable_timestamp": True,
-                },
-                "additions": json.dumps({
-                    "disable_markdown_filter": False,
-                }),
-                "text": text,
-            },
+        # 只复制外层和 req_params 两层，其余字段共享会话内的基础请求
+        base_request = self._base_request
+        synthesis_request = {
+            **base_request,
+            "req_params": {**base_request["req_params"], "text": text},
+            "event": EventType.TaskRequest,
         }
 
-        synthesis_request = base_request.copy()
-        synthesis_request["event"] = EventType.TaskRequest
-
         await task_request(
             self.websocket,
-            json.dumps(synthesis_request).encode(),
+            _json_bytes(synthesis_request),
             self.session_id
         )
 
     async def _receive_audio_async(self):
         """异步接收音频数据"""
-        while self.is_session_active or not self.audio_queue.empty():
+        # 循环内高频访问的属性缓存为局部变量；同时绑定本会话的缓冲区，
+        # 避免旧接收任务在下一轮 start_session 替换 audio_queue 后写错对象
+        audio_queue = self.audio_queue
+        websocket = self.websocket
+
+        while self.is_session_active or not audio_queue.empty():
             try:
-                msg = await asyncio.wait_for(receive_message(self.websocket), timeout=1.0)
+                msg = await asyncio.wait_for(receive_message(websocket), timeout=1.0)
+                msg_type = msg.type
 
-                if msg.type == MsgType.FullServerResponse:
-                    if msg.event == EventType.SessionFinished:
-                        # 会话结束
-                        self.is_session_active = False
-                        # 等待一小段时间确保所有音频都收到
-                        await asyncio.sleep(0.5)
-                        self.audio_queue.put(None)  # 结束信号
-                        break
-                    elif msg.event == EventType.TTSSentenceStart:
-                        if not self.first_audio_received:
-                            self.start_time = time.time()
-                elif msg.type == MsgType.AudioOnlyServer:
+                # 音频帧最频繁，先判断并直接进入下一次接收，不走后面的事件分支
+                if msg_type is MsgType.AudioOnlyServer:
                     audio_data = msg.payload
                     if audio_data:
-                        self.audio_queue.put(audio_data)
+                        try:
+                            audio_queue.put_nowait(audio_data)
+                        except queue.Full:
+                            # 播放跟不上时在线程中分段等待空位，不阻塞事件循环（send_text 仍可执行）；
+                            # 会话结束或缓冲区被关闭（打断）即放弃，不会留下一直阻塞的线程
+                            while self.is_session_active and not audio_queue.closed:
+                                try:
+                                    await asyncio.to_thread(audio_queue.put, audio_data, 0.5)
+                                    break
+                                except queue.Full:
+                                    continue
 
                         if not self.first_audio_received:
-                            self.first_audio_received = True
-                            if self.start_time:
-                                self.first_audio_delay = time.time() - self.start_time
-                                # print(f'[火山引擎实时TTS] 首个音频块延迟: {self.first_audio_delay:.3f}秒')  # 静默
-                elif msg.type == MsgType.Error:
+                            self._mark_first_audio()
+                    continue
+
+                if msg_type == MsgType.FullServerResponse:
+                    event = msg.event
+                    if event == EventType.SessionFinished:
+                        # 会话结束：WebSocket 消息有序，SessionFinished 之前的音频帧都已入队，
+                        # 直接发结束信号，不再固定等待
+                        self.is_session_active = False
+                        audio_queue.close()  # 结束信号（不占槽位，缓冲区满时也不会阻塞事件循环）
+                        break
+                    elif event == EventType.TTSSentenceStart:
+                        if not self.first_audio_received:
+                            self.start_time = time.time()
+                elif msg_type == MsgType.Error:
                     error_msg = msg.payload.decode('utf-8') if isinstance(msg.payload, bytes) else str(msg.payload)
                     # print(f'❌ TTS 错误: {error_msg}')  # 静默
-                    self.audio_queue.put(None)
+                    audio_queue.close()
                     break
             except asyncio.TimeoutError:
                 # 如果会话已结束且超时，说明没有更多数据了
                 if not self.is_session_active:
-                    self.audio_queue.put(None)
+                    audio_queue.close()
                     break
                 continue
             except Exception as e:
                 # 断开连接时的错误是正常的，静默处理
                 # print(f'❌ TTS 接收错误: {e}')  # 静默
-                self.audio_queue.put(None)
+                audio_queue.close()
                 break
 
+    def _mark_first_audio(self):
+        """记录首个音频块延迟"""
+        self.first_audio_received = True
+        if self.start_time:
+            self.first_audio_delay = time.time() - self.start_time
+            # print(f'[火山引擎实时TTS] 首个音频块延迟: {self.first_audio_delay:.3f}秒')  # 静默
+
     async def _finish_session_async(self):
         """异步结束会话"""
         if self.is_session_active:
@@ -261,7 +304,7 @@ class VolcengineRealtimeTTS:
                 # print(f'❌ TTS 断开连接时出错: {e}')  # 静默
                 self.is_connected = False
 
-    def start_session(self, audio_format: str = "pcm", sample_rate: int = 24000) -> queue.Queue:
+    def start_session(self, audio_format: str = "pcm", sample_rate: int = 24000) -> AudioRingBuffer:
         """
         启动实时 TTS 会话
 
@@ -281,15 +324,20 @@ class VolcengineRealtimeTTS:
             except:
                 pass
 
-        # 创建新的音频队列（每次对话创建新队列）
-        self.audio_queue = queue.Queue()
+        # 创建新的音频缓冲区（每次对话创建新的；接收循环单生产者、播放器单消费者）
+        self.audio_queue = AudioRingBuffer()
 
         # 只在未连接时才建立 WebSocket 连接（复用连接）
         if not self.is_connected:
             self._run_coroutine(self._connect_async())
 
         # 启动新会话
-        self._run_coroutine(self._start_session_async())
+        try:
+            self._run_coroutine(self._start_session_async())
+        except websockets.exceptions.ConnectionClosed:
+            # 空闲期间连接被服务端关闭，重连后重试一次
+            self._run_coroutine(self._connect_async())
+            self._run_coroutine(self._start_session_async())
 
         # 启动接收线程（保存引用以便清理）
         self.receive_task = asyncio.run_coroutine_threadsafe(
@@ -320,14 +368,9 @@ class VolcengineRealtimeTTS:
     def clear_queue(self):
         """清空音频队列（用于打断）"""
         if self.audio_queue:
-            # 清空队列中的所有数据
-            while not self.audio_queue.empty():
-                try:
-                    self.audio_queue.get_nowait()
-                except:
-                    break
-            # 放入结束信号
-            self.audio_queue.put(None)
+            # 打断线程既不是生产者也不是消费者：丢弃未播放的数据并发出结束信号
+            self.audio_queue.clear()
+            self.audio_queue.close()
 
     def disconnect(self):
         """断开连接"""
@@ -344,9 +387,9 @@ class VolcengineRealtimeTTS:
         # 停止事件循环
         if self.loop and self.loop.is_running():
             self.loop.call_soon_threadsafe(self.loop.stop)
-            # 等待事件循环停止
-            import time
-            time.sleep(0.1)
+            # 等待事件循环线程退出
+            if self.loop_thread:
+                self.loop_thread.join(timeout=1.0)
 
     def get_metrics(self) -> dict:
         """获取性能指标"""
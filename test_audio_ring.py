@@ -0,0 +1,209 @@
+"""
+测试音频环形缓冲区（AudioRingBuffer）
+
+测试场景：
+1. 绕回：写读次数超过容量后顺序不乱
+2. clear：丢弃未读数据，且能唤醒因缓冲区满而阻塞的生产者
+3. close：读完已写入数据后返回 None，并唤醒阻塞的生产者
+"""
+
+import os
+import sys
+import queue
+import threading
+
+# 添加 src 目录到路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "src"))
+
+from audio.audio_ring import AudioRingBuffer
+
+
+def test_wraparound():
+    """多次绕回后先进先出顺序保持不变"""
+    ring = AudioRingBuffer(capacity=4)
+    expected = 0
+    for i in range(50):
+        ring.put(i)
+        if ring.qsize() == 3:
+            # 积压三项时读两项，使读写位置在不同槽位绕回
+            for _ in range(2):
+                assert ring.get_nowait() == expected
+                expected += 1
+        assert ring.qsize() == i + 1 - expected
+    while not ring.empty():
+        assert ring.get_nowait() == expected
+        expected += 1
+    assert expected == 50
+
+
+def test_full_and_capacity():
+    """容量向上取整为 2 的幂，写满后 put_nowait 抛出 queue.Full"""
+    ring = AudioRingBuffer(capacity=3)
+    for i in range(4):
+        ring.put_nowait(i)
+    try:
+        ring.put_nowait(4)
+        assert False, "缓冲区已满时应抛出 queue.Full"
+    except queue.Full:
+        pass
+    try:
+        ring.put(4, timeout=0.01)
+        assert False, "缓冲区已满且超时应抛出 queue.Full"
+    except queue.Full:
+        pass
+    assert [ring.get_nowait() for _ in range(4)] == [0, 1, 2, 3]
+    try:
+        ring.get_nowait()
+        assert False, "缓冲区为空时应抛出 queue.Empty"
+    except queue.Empty:
+        pass
+
+
+def test_clear_discards_pending():
+    """clear 丢弃未读数据，之后写入的数据正常读出"""
+    ring = AudioRingBuffer(capacity=8)
+    for i in range(5):
+        ring.put(i)
+    assert ring.get_nowait() == 0
+    ring.clear()
+    assert ring.empty()
+    assert ring.qsize() == 0
+    ring.put("a")
+    ring.put("b")
+    assert ring.qsize() == 2
+    assert ring.get_nowait() == "a"
+    assert ring.get(timeout=0.1) == "b"
+    assert ring.empty()
+
+
+def test_clear_frees_space_for_producer():
+    """缓冲区满时 clear 后，生产者无需等消费者逐项读取即可继续写入"""
+    ring = AudioRingBuffer(capacity=4)
+    for i in range(4):
+        ring.put(i)
+    assert ring.get_nowait() == 0
+    ring.put(4)
+    ring.clear()
+    # 消费者尚未应用 clear：除其当前读位置所在槽位外，被丢弃的槽位可立即复用
+    try:
+        ring.put_nowait(10)
+        assert False, "消费者读位置所在槽位不应被覆盖"
+    except queue.Full:
+        pass
+    try:
+        ring.get_nowait()  # 消费者轮询时应用 clear
+        assert False, "clear 后缓冲区应为空"
+    except queue.Empty:
+        pass
+    for i in range(4):
+        ring.put_nowait(10 + i)
+    assert [ring.get_nowait() for _ in range(4)] == [10, 11, 12, 13]
+
+
+def test_clear_wakes_blocked_producer():
+    """生产者因缓冲区满阻塞在 put 中时，clear 后消费者一次非阻塞读取即可将其唤醒"""
+    ring = AudioRingBuffer(capacity=4)
+    for i in range(4):
+        ring.put(i)
+
+    done = threading.Event()
+
+    def producer():
+        ring.put(4, timeout=2.0)
+        done.set()
+
+    t = threading.Thread(target=producer)
+    t.start()
+    assert not done.wait(0.05), "缓冲区满时生产者应阻塞"
+    ring.clear()
+    try:
+        ring.get_nowait()  # 播放回调的轮询：应用 clear 并腾出全部槽位
+    except queue.Empty:
+        pass
+    assert done.wait(1.0), "clear 后生产者应被唤醒"
+    t.join()
+    assert ring.get_nowait() == 4
+    assert ring.empty()
+
+
+def test_close_drains_then_signals_end():
+    """close 后先读完已写入的数据，再返回结束信号 None"""
+    ring = AudioRingBuffer(capacity=8)
+    ring.put(1)
+    ring.put(2)
+    ring.close()
+    ring.put(3)  # 关闭后写入直接丢弃
+    assert ring.get_nowait() == 1
+    assert ring.get(timeout=0.1) == 2
+    assert ring.get_nowait() is None
+    assert ring.get(timeout=0.1) is None
+
+
+def test_clear_then_close_signals_end():
+    """打断流程（clear 后 close）时，非阻塞读取立即得到结束信号"""
+    ring = AudioRingBuffer(capacity=8)
+    for i in range(5):
+        ring.put(i)
+    ring.clear()
+    ring.close()
+    assert ring.get_nowait() is None
+    assert ring.get(timeout=0.1) is None
+
+
+def test_close_wakes_blocked_consumer_and_producer():
+    """close 唤醒阻塞在 get 的消费者和阻塞在 put 的生产者"""
+    ring = AudioRingBuffer(capacity=2)
+    results = []
+
+    consumer = threading.Thread(target=lambda: results.append(ring.get(timeout=2.0)))
+    consumer.start()
+    assert consumer.is_alive()
+    ring.close()
+    consumer.join(1.0)
+    assert not consumer.is_alive()
+    assert results == [None]
+
+    ring = AudioRingBuffer(capacity=2)
+    ring.put(0)
+    ring.put(1)
+    producer = threading.Thread(target=lambda: ring.put(2, timeout=2.0))
+    producer.start()
+    ring.close()
+    producer.join(1.0)
+    assert not producer.is_alive()
+    assert ring.qsize() == 2
+
+
+def test_threaded_stream_order():
+    """生产者/消费者并发读写时数据完整且有序"""
+    ring = AudioRingBuffer(capacity=16)
+    total = 5000
+    received = []
+
+    def consumer():
+        while True:
+            item = ring.get(timeout=2.0)
+            if item is None:
+                break
+            received.append(item)
+
+    t = threading.Thread(target=consumer)
+    t.start()
+    for i in range(total):
+        ring.put(i + 1, timeout=2.0)
+    ring.close()
+    t.join(5.0)
+    assert received == list(range(1, total + 1))
+
+
+if __name__ == "__main__":
+    test_wraparound()
+    test_full_and_capacity()
+    test_clear_discards_pending()
+    test_clear_frees_space_for_producer()
+    test_clear_wakes_blocked_producer()
+    test_close_drains_then_signals_end()
+    test_clear_then_close_signals_end()
+    test_close_wakes_blocked_consumer_and_producer()
+    test_threaded_stream_order()
+    print("全部测试通过")
@@ -3,8 +3,10 @@ ASR 集成示例 - 将语音识别集成到主程序
 支持 AEC（回声消除）功能
 """
 import os
+import signal
 import sys
 import time
+import threading
 from typing import Optional
 
 
@@ -13,6 +15,8 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.asr import DashScopeASR, AudioInput, InterruptController
 from src.asr.aec_processor import SimpleAEC
+from src.audio.pyaudio_player import PyAudioStreamPlayer
+from src.realtime_pipeline import RealtimeStreamingPipeline
 from src.main import LLMTTSTest
 from src.role_loader import RoleLoader
 from src.config_loader import ConfigLoader
@@ -83,7 +87,7 @@ class VoiceInteractiveMode:
         role_config = role_loader.get_role("xuejie")  # 使用学姐助手角色
 
         # 初始化主程序
-        self.llm_tts = LLMTTSTest(role_config=role_config)
+        self.llm_tts = LLMTTSTest(role_config=role_config, config=self.config)
 
         # 提前校验 LLM 配置，避免进入语音流程后才 401
         llm_cfg = self.llm_tts.config.get("openai_compatible", {})
@@ -163,7 +167,7 @@ class VoiceInteractiveMode:
         self.current_player = None    # 当前正在播放的 player
         self.current_tts_thread = None  # 当前 TTS 线程
         self.last_sentence_time = 0  # 上次触发对话的时间（防止太快重复触发）
-        self.should_exit = False  # 退出标志
+        self.exit_event = threading.Event()  # 退出信号
 
     def on_asr_text(self, text: str):
         """ASR 中间结果回调"""
@@ -175,6 +179,10 @@ class VoiceInteractiveMode:
         self.current_text = text
         print(f'\r💬 {text}', end='', flush=True)
 
+    def _on_sigint(self, signum, frame):
+        """Ctrl+C 处理：唤醒主线程退出，而不是在任意位置抛出 KeyboardInterrupt"""
+        self.exit_event.set()
+
     def on_asr_sentence(self, text: str):
         """ASR 完整句子回调"""
         # 过滤空文本和太短的文本（避免噪音触发）
@@ -186,8 +194,8 @@ class VoiceInteractiveMode:
         if any(keyword in text.strip() for keyword in exit_keywords):
             print(f'\n\n👋 检测到退出命令: "{text}"')
             print('正在退出程序...')
-            # 设置退出标志
-            self.should_exit = True
+            # 唤醒主线程退出
+            self.exit_event.set()
             return
 
         # 如果 AI 正在说话，检查是否是真实打断
@@ -209,7 +217,7 @@ class VoiceInteractiveMode:
             print(f'\n🔔 检测到打断: "{text}" (长度: {text_length})')
 
         # 防止说话太快时重复触发（间隔少于1秒的忽略）
-        current_time = time.time()
+        current_time = time.monotonic()
         if current_time - self.last_sentence_time < 1.0 and not self.is_tts_playing:
             return
         self.last_sentence_time = current_time
@@ -226,7 +234,6 @@ class VoiceInteractiveMode:
         self.is_listening = False
 
         # 在新线程中处理 LLM + TTS，避免阻塞 ASR
-        import threading
         tts_thread = threading.Thread(target=self._process_and_speak, args=(text,))
         tts_thread.daemon = True
         tts_thread.start()
@@ -247,9 +254,6 @@ class VoiceInteractiveMode:
                 history.append(msg)
 
             # 复用全局 TTS 客户端（不再每次创建新的）
-            from src.audio.pyaudio_player import PyAudioStreamPlayer
-            from src.realtime_pipeline import RealtimeStreamingPipeline
-
             # 创建流式播放器（每次创建新的，避免状态冲突）
             streaming_player = PyAudioStreamPlayer(
                 sample_rate=24000
@@ -347,9 +351,14 @@ class VoiceInteractiveMode:
             self.is_listening = True
             print('🎤 请说话...\n')
 
-            # 持续运行，检查退出标志
-            while not self.should_exit:
-                time.sleep(0.1)
+            # Ctrl+C 与语音退出命令走同一条路径：只置位退出信号，由主线程按顺序清理
+            previous_sigint = signal.signal(signal.SIGINT, self._on_sigint)
+            try:
+                # 阻塞等待退出信号（set 后立即返回；带超时以便 Windows 上信号处理函数也能及时执行）
+                while not self.exit_event.wait(timeout=1.0):
+                    pass
+            finally:
+                signal.signal(signal.SIGINT, previous_sigint)
 
             # 正常退出
             print('\n👋 再见!')
@@ -373,7 +382,8 @@ class VoiceInteractiveMode:
                 if hasattr(self.realtime_tts, 'disconnect'):
                     self.realtime_tts.disconnect()
 
-            # 关闭 Mem0 连接，确保数据持久化
+            # 关闭 Mem0 连接，确保数据持久化（先等待后台存储完成）
+            self.llm_tts.memory_chat.close()
             if self.llm_tts.mem0_manager:
                 self.llm_tts.mem0_manager.close()
 